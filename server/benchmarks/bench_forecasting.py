@@ -0,0 +1,43 @@
+"""
+Benchmark the local forecasting engine on multi-year daily sales data.
+
+Run from the server directory:
+    python -m benchmarks.bench_forecasting
+"""
+import time
+import numpy as np
+import pandas as pd
+from services.forecasting import build_forecast
+
+
+def synthetic_sales(years: int, seed: int = 0) -> pd.DataFrame:
+    """Daily sales with growth, yearly seasonality, a weekend bump and noise"""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2015-01-01", periods=365 * years, freq="D")
+    t = np.arange(len(dates))
+    yearly = 1 + 0.25 * np.sin(2 * np.pi * (dates.dayofyear.to_numpy() - 80) / 365.25)
+    weekend = np.where(dates.dayofweek.to_numpy() >= 5, 1.2, 1.0)
+    sales = 20000 * (1 + 0.0004 * t) * yearly * weekend * rng.normal(1, 0.08, len(dates))
+    return pd.DataFrame({
+        "Date": dates.strftime("%Y-%m-%d"),
+        "Daily Sales (THB)": sales.round().astype(int),
+    })
+
+
+def bench(years: int, repeats: int = 20) -> float:
+    frames = {"TotalSales": synthetic_sales(years)}
+    build_forecast(frames)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        build_forecast(frames)
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+def main():
+    print(f"{'years':>5} {'rows':>7} {'ms/forecast':>12}")
+    for years in (1, 3, 5, 10, 20):
+        print(f"{years:>5} {365 * years:>7} {bench(years):>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
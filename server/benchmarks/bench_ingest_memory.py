@@ -0,0 +1,84 @@
+"""
+Compare peak memory of the old upload path (whole file in memory, then
+pd.read_excel) with the spooled, row-streamed reader, on generated
+workbooks of increasing size. Each measurement runs in a fresh process.
+
+Run from the server directory:
+    python -m benchmarks.bench_ingest_memory
+"""
+import os
+import sys
+import time
+import resource
+import tempfile
+import subprocess
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+
+ROWS = (10_000, 50_000, 200_000)
+
+
+def synthetic_workbook(path: str, rows: int, seed: int = 0) -> str:
+    """One sales sheet with a date, two categories and three measures"""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2015-01-01", periods=rows, freq="h").to_pydatetime()
+    products = rng.choice(["Mango", "Apple", "Durian", "Melon", "Orange"], rows)
+    regions = rng.choice(["North", "South", "East", "West"], rows)
+    units = rng.integers(1, 200, rows)
+    prices = rng.uniform(20, 120, rows).round(2)
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("TotalSales")
+    ws.append(["Date", "Product", "Region", "Units", "Price", "Daily Sales (THB)"])
+    for i in range(rows):
+        ws.append([dates[i], products[i], regions[i], int(units[i]), float(prices[i]),
+                   float(round(units[i] * prices[i], 2))])
+    wb.save(path)
+    return path
+
+
+def _peak_mb() -> float:
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _child(mode: str, path: str):
+    import io
+    from services.excel_ingest import read_workbook
+    baseline = _peak_mb()
+    start = time.perf_counter()
+    if mode == "read_excel":
+        with open(path, "rb") as f:
+            contents = f.read()
+        frames = pd.read_excel(io.BytesIO(contents), sheet_name=None)
+    else:
+        frames = read_workbook(path)
+    elapsed = time.perf_counter() - start
+    rows = sum(len(df) for df in frames.values())
+    print(f"{rows} {_peak_mb() - baseline:.1f} {elapsed:.2f}")
+
+
+def measure(mode: str, path: str):
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_ingest_memory", "--child", mode, path],
+        check=True, capture_output=True, text=True,
+    ).stdout.split()
+    return int(out[0]), float(out[1]), float(out[2])
+
+
+def main():
+    print(f"{'rows':>8} {'file MB':>8} {'read_excel MB':>14} {'streamed MB':>12} {'read_excel s':>13} {'streamed s':>11}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in ROWS:
+            path = synthetic_workbook(os.path.join(tmp, f"sales_{rows}.xlsx"), rows)
+            size = os.path.getsize(path) / (1024 * 1024)
+            _, legacy_mb, legacy_s = measure("read_excel", path)
+            _, streamed_mb, streamed_s = measure("streamed", path)
+            print(f"{rows:>8} {size:>8.1f} {legacy_mb:>14.1f} {streamed_mb:>12.1f} {legacy_s:>13.2f} {streamed_s:>11.2f}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "--child":
+        _child(sys.argv[2], sys.argv[3])
+    else:
+        main()
@@ -0,0 +1,273 @@
+"""
+In-process stand-ins for the async Azure AI Agents, Azure Identity and
+Azure OpenAI clients built by services.clients.
+
+They mimic the parts of the SDK surface the pipeline touches and simulate
+service latency with asyncio.sleep, so tests and benchmarks can exercise the
+real analysis code paths (including concurrency) without network access.
+"""
+import ast
+import asyncio
+import itertools
+import json
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+from azure.ai.agents.models import MessageTextContent, MessageTextDetails
+from azure.core.exceptions import ResourceNotFoundError
+
+SAMPLE_ANALYSIS: Dict[str, Any] = {
+    "sales_forecasting": {
+        "title": "Advanced Sales Prediction & Forecasting",
+        "summary": "Sales are stable with a mild upward trend",
+        "monthly_forecasts": [
+            {"month": "July 2025", "most_likely": 35000, "best_case": 45500, "worst_case": 21000, "confidence": 85}
+        ],
+        "key_insights": ["Weekend sales are higher"],
+        "recommendations": ["Increase weekend staffing"],
+    },
+    "data_sources": ["https://example.com/source1"],
+}
+
+
+# Service-side state, shared by every fake client like the real service
+_THREADS: Dict[str, List[Any]] = {}
+_AGENTS: Dict[str, Any] = {}
+
+
+class FakeSettings:
+    """Knobs shared by every fake client instance"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        # Seconds spent inside runs.create_and_process
+        self.run_latency = 0.2
+        # Seconds spent on every other control-plane call
+        self.call_latency = 0.01
+        # Seconds spent on a chat completion
+        self.completion_latency = 0.05
+        self.reply = json.dumps(SAMPLE_ANALYSIS)
+        self.calls: Dict[str, int] = {}
+        _THREADS.clear()
+        _AGENTS.clear()
+
+    def record(self, name: str):
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+
+settings = FakeSettings()
+_ids = itertools.count(1)
+
+
+def _new_id(prefix: str) -> str:
+    return f"{prefix}_{next(_ids)}"
+
+
+class _Record(dict):
+    """Dict that also exposes its keys as attributes, like SDK models"""
+
+    def __getattr__(self, item):
+        try:
+            return self[item]
+        except KeyError as e:
+            raise AttributeError(item) from e
+
+
+class _AsyncList:
+    def __init__(self, items: List[Any]):
+        self._items = items
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for item in self._items:
+            yield item
+
+
+async def _call(name: str, latency: Optional[float] = None):
+    settings.record(name)
+    await asyncio.sleep(settings.call_latency if latency is None else latency)
+
+
+class _Threads:
+    async def create(self, **kwargs):
+        await _call("threads.create")
+        thread = _Record(id=_new_id("thread"))
+        _THREADS[thread.id] = []
+        return thread
+
+    async def delete(self, thread_id: str, **kwargs):
+        await _call("threads.delete")
+        _THREADS.pop(thread_id, None)
+
+
+class _Messages:
+    async def create(self, thread_id: str, role: str, content: str, **kwargs):
+        await _call("messages.create")
+        message = _Record(id=_new_id("msg"), role=role, content=content)
+        _THREADS.setdefault(thread_id, []).append(message)
+        return message
+
+    def list(self, thread_id: str, **kwargs):
+        settings.record("messages.list")
+        # The service lists newest first
+        return _AsyncList(list(reversed(_THREADS.get(thread_id, []))))
+
+
+class _Runs:
+    async def create_and_process(self, thread_id: str, agent_id: str, **kwargs):
+        if agent_id not in _AGENTS:
+            await _call("runs.create_and_process")
+            raise ResourceNotFoundError(f"No assistant found with id '{agent_id}'.")
+        await _call("runs.create_and_process", settings.run_latency)
+        reply = _Record(
+            id=_new_id("msg"),
+            role="assistant",
+            content=[MessageTextContent(text=MessageTextDetails(value=settings.reply, annotations=[]))],
+        )
+        _THREADS.setdefault(thread_id, []).append(reply)
+        return _Record(id=_new_id("run"), status="completed", thread_id=thread_id, agent_id=agent_id)
+
+
+class _RunSteps:
+    def list(self, thread_id: str, run_id: str, **kwargs):
+        settings.record("run_steps.list")
+        step = _Record(id=_new_id("step"), status="completed", step_details={"tool_calls": []})
+        return _AsyncList([step])
+
+
+class FakeAgentsClient:
+    """Stand-in for azure.ai.agents.aio.AgentsClient"""
+
+    def __init__(self, endpoint: str = "", credential: Any = None, **kwargs):
+        self.endpoint = endpoint
+        self.credential = credential
+        self.threads = _Threads()
+        self.messages = _Messages()
+        self.runs = _Runs()
+        self.run_steps = _RunSteps()
+
+    async def create_agent(self, model: str, name: str, instructions: str = "",
+                           metadata: Optional[Dict[str, str]] = None, **kwargs):
+        await _call("create_agent")
+        agent = _Record(id=_new_id("asst"), model=model, name=name, instructions=instructions,
+                        metadata=metadata or {})
+        _AGENTS[agent.id] = agent
+        return agent
+
+    async def get_agent(self, agent_id: str, **kwargs):
+        await _call("get_agent")
+        if agent_id not in _AGENTS:
+            raise ResourceNotFoundError(f"No assistant found with id '{agent_id}'.")
+        return _AGENTS[agent_id]
+
+    def list_agents(self, **kwargs):
+        settings.record("list_agents")
+        return _AsyncList(list(reversed(list(_AGENTS.values()))))
+
+    async def delete_agent(self, agent_id: str, **kwargs):
+        await _call("delete_agent")
+        _AGENTS.pop(agent_id, None)
+
+    def enable_auto_function_calls(self, *args, **kwargs):
+        pass
+
+    async def close(self):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+
+class FakeCredential:
+    """Stand-in for azure.identity.aio.DefaultAzureCredential"""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    async def get_token(self, *scopes, **kwargs):
+        settings.record("credential.get_token")
+        return SimpleNamespace(token="fake-token", expires_on=2**31)
+
+    async def close(self):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+
+def fake_bearer_token_provider(credential: Any, *scopes: str):
+    async def provider():
+        token = await credential.get_token(*scopes)
+        return token.token
+
+    return provider
+
+
+def _repair(text: str) -> str:
+    """Approximate what the repair model does with a Python dict repr"""
+    try:
+        value = ast.literal_eval(text)
+    except (ValueError, SyntaxError):
+        return text
+    if isinstance(value, dict) and isinstance(value.get("value"), str):
+        return value["value"]
+    return json.dumps(value)
+
+
+class _Completions:
+    def __init__(self, token_provider: Any):
+        self._token_provider = token_provider
+
+    async def create(self, messages: List[Dict[str, str]], **kwargs):
+        # The real client asks the token provider for a token on every request
+        if self._token_provider is not None:
+            await self._token_provider()
+        await _call("chat.completions.create", settings.completion_latency)
+        prompt = messages[-1]["content"]
+        content = _repair(prompt.split("\n\n", 1)[-1])
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+class FakeAsyncAzureOpenAI:
+    """Stand-in for openai.AsyncAzureOpenAI"""
+
+    def __init__(self, *args, azure_ad_token_provider: Any = None, **kwargs):
+        self.chat = SimpleNamespace(completions=_Completions(azure_ad_token_provider))
+
+    async def close(self):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+
+def install(monkeypatch):
+    """
+    Point the shared client registry at the fakes using pytest's monkeypatch
+    and start from a fresh registry.
+    """
+    from services import clients
+
+    monkeypatch.setenv("PROJECT_ENDPOINT", "https://fake.services.ai.azure.com/api/projects/fake")
+    monkeypatch.setenv("BING_CONNECTION_NAME", "fake-bing-connection")
+    monkeypatch.setenv("MODEL_DEPLOYMENT_NAME", "fake-model")
+    monkeypatch.setattr(clients, "AgentsClient", FakeAgentsClient)
+    monkeypatch.setattr(clients, "DefaultAzureCredential", FakeCredential)
+    monkeypatch.setattr(clients, "get_bearer_token_provider", fake_bearer_token_provider)
+    monkeypatch.setattr(clients, "AsyncAzureOpenAI", FakeAsyncAzureOpenAI)
+    monkeypatch.setattr(clients, "_registry", None)
+    settings.reset()
+    return settings
@@ -1,8 +1,22 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from routers import ai
+from services import clients, jobs
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Share one credential and one set of pooled Azure clients across requests
+    app.state.azure_clients = await clients.startup()
+    # Workers for queued analysis jobs, including any left over from a restart
+    app.state.job_runner = await jobs.startup()
+    yield
+    await jobs.shutdown()
+    await clients.shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -1,6 +1,11 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException
 from services.ai_services import ai_analyze, ai_analyze_excel_data
+from services.clients import get_clients
+from services.analysis_cache import get_analysis_cache
+from services.excel_ingest import IngestLimitExceeded, spool_upload
+from services.jobs import get_job_runner, job_view
 import json
+import asyncio
 
 router = APIRouter()
 
@@ -13,28 +18,53 @@ async def read_users():
 
 @router.get("/ai/", tags=["ai"])
 async def read_ai():
-    return ai_analyze()
+    return await ai_analyze()
+
+
+@router.get("/ai/clients/stats/", tags=["ai"])
+async def read_client_stats():
+    """
+    Client pool and token cache counters for the shared Azure clients
+    """
+    return get_clients().get_stats()
+
+
+@router.get("/ai/cache/stats/", tags=["ai"])
+async def read_cache_stats():
+    """
+    Hit/miss counters for the analysis result cache
+    """
+    return get_analysis_cache().get_stats()
 
 
 @router.post("/ai/analyze-excel/", tags=["ai"])
-async def analyze_excel(file: UploadFile = File(...)):
+async def analyze_excel(file: UploadFile = File(...), bypass_cache: bool = False):
     """
     Upload Excel file and get comprehensive AI analysis including:
     - Sales prediction
     - Promotion suggestions
     - Stock management recommendations
     - Stock level optimization
+
+    Identical workbooks are answered from the analysis cache; pass
+    ``bypass_cache=true`` to force a fresh analysis.
+
+    The upload is spooled to disk and parsed row by row; files or sheets over
+    MAX_UPLOAD_BYTES / MAX_SHEET_ROWS are rejected with 413.
     """
+    spooled = None
     try:
         # Validate file type
         if not file.filename.endswith(('.xlsx', '.xls')):
             raise HTTPException(status_code=400, detail="Only Excel files (.xlsx, .xls) are allowed")
         
-        # Read the Excel file
-        contents = await file.read()
+        # Spool the Excel file to disk
+        spooled = await spool_upload(file)
         
         # Process Excel and get AI analysis
-        analysis_result = await ai_analyze_excel_data(contents, file.filename)
+        analysis_result = await ai_analyze_excel_data(
+            spooled.path, file.filename, bypass_cache=bypass_cache, content_sha256=spooled.sha256
+        )
         
         return {
             "message": "Excel file analyzed successfully",
@@ -42,6 +72,55 @@ async def analyze_excel(file: UploadFile = File(...)):
             "analysis": analysis_result
         }
         
+    except HTTPException:
+        raise
+    except IngestLimitExceeded as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing file: {str(e)}")
+    finally:
+        if spooled is not None:
+            spooled.cleanup()
 
+
+
+@router.post("/ai/analyze-excel/jobs/", tags=["ai"], status_code=202)
+async def submit_excel_job(file: UploadFile = File(...), bypass_cache: bool = False):
+    """
+    Queue an Excel analysis and return right away with a job id; poll
+    ``GET /ai/jobs/{job_id}`` for its status and, once it has succeeded,
+    the same body ``POST /ai/analyze-excel/`` returns.
+    """
+    if not file.filename.endswith(('.xlsx', '.xls')):
+        raise HTTPException(status_code=400, detail="Only Excel files (.xlsx, .xls) are allowed")
+    try:
+        spooled = await spool_upload(file)
+    except IngestLimitExceeded as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+    try:
+        job = await get_job_runner().submit(spooled.path, file.filename, spooled.sha256, bypass_cache)
+    finally:
+        # Gone already if the job store took the file over
+        spooled.cleanup()
+    return {**job_view(job), "status_url": f"/ai/jobs/{job['id']}"}
+
+
+@router.get("/ai/jobs/{job_id}", tags=["ai"])
+async def read_job(job_id: str):
+    """
+    Status of an analysis job: queued, running (with its current stage),
+    succeeded (with the result) or failed (with the error)
+    """
+    job = await get_job_runner().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_view(job)
+
+
+@router.get("/ai/jobs/stats/", tags=["ai"])
+async def read_job_stats():
+    """
+    Job counts by status and the size of this worker's pool
+    """
+    return await asyncio.to_thread(get_job_runner().get_stats)
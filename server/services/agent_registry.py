@@ -0,0 +1,135 @@
+import json
+import asyncio
+import hashlib
+from typing import Dict, Any, List, Optional
+from azure.core.exceptions import ResourceNotFoundError
+
+# Metadata stamped on every agent this registry creates, so other workers (and
+# this one after a restart) can find and reuse it on the service side.
+MANAGED_BY = "excel-analysis-agent-registry"
+
+
+def _tool_dicts(tools: Optional[List[Any]]) -> List[Any]:
+    result = []
+    for tool in tools or []:
+        result.append(tool.as_dict() if hasattr(tool, "as_dict") else tool)
+    return result
+
+
+def definition_hash(model: str, instructions: str, tools: Optional[List[Any]] = None) -> str:
+    """
+    Stable hash of everything that makes two agent definitions interchangeable
+    """
+    payload = json.dumps(
+        {"model": model, "instructions": instructions, "tools": _tool_dicts(tools)},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+class AgentRegistry:
+    """
+    Creates each agent definition once and hands out its ID to every request.
+
+    Agents are looked up by a hash of model + instructions + tools: first in
+    this process, then among the agents already on the service (created by
+    another worker or a previous run), and only created when neither has one.
+    A changed definition hashes differently and therefore gets a new agent.
+    """
+
+    def __init__(self, stats: Dict[str, int]):
+        self._stats = stats
+        self._agent_ids: Dict[str, str] = {}
+        self._definitions: Dict[str, Dict[str, Any]] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        for key in ("agent_created", "agent_reused", "agent_adopted", "agent_recreated"):
+            self._stats.setdefault(key, 0)
+
+    async def get_agent_id(self, agents_client, *, model: str, name: str, instructions: str,
+                           tools: Optional[List[Any]] = None, toolset: Any = None) -> str:
+        """Return the ID of an agent matching this definition, creating it if needed"""
+        if toolset is not None:
+            tools = toolset.definitions
+        definition = {"model": model, "name": name, "instructions": instructions, "tools": tools}
+        key = definition_hash(model, instructions, tools)
+
+        agent_id = self._agent_ids.get(key)
+        if agent_id:
+            self._stats["agent_reused"] += 1
+            return agent_id
+
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            agent_id = self._agent_ids.get(key)
+            if agent_id:
+                self._stats["agent_reused"] += 1
+                return agent_id
+
+            agent_id = await self._find_existing(agents_client, name, key)
+            if agent_id:
+                self._stats["agent_adopted"] += 1
+                print(f"♻️ Reusing agent {name}, ID: {agent_id}")
+            else:
+                agent_id = await self._create(agents_client, definition, key)
+
+            self._agent_ids[key] = agent_id
+            self._definitions[agent_id] = definition
+            return agent_id
+
+    async def _find_existing(self, agents_client, name: str, key: str) -> Optional[str]:
+        async for agent in agents_client.list_agents(limit=100):
+            metadata = agent.get("metadata") or {}
+            if (
+                agent.get("name") == name
+                and metadata.get("managed_by") == MANAGED_BY
+                and metadata.get("definition_hash") == key
+            ):
+                return agent["id"]
+        return None
+
+    async def _create(self, agents_client, definition: Dict[str, Any], key: str) -> str:
+        agent = await agents_client.create_agent(
+            model=definition["model"],
+            name=definition["name"],
+            instructions=definition["instructions"],
+            tools=definition["tools"],
+            metadata={"managed_by": MANAGED_BY, "definition_hash": key},
+        )
+        self._stats["agent_created"] += 1
+        print(f"✅ Created agent {definition['name']}, ID: {agent.id}")
+        return agent.id
+
+    async def recreate(self, agents_client, agent_id: str) -> str:
+        """Replace an agent that no longer exists on the service"""
+        definition = self._definitions[agent_id]
+        key = definition_hash(definition["model"], definition["instructions"], definition["tools"])
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            current = self._agent_ids.get(key)
+            if current and current != agent_id:
+                # Another request already replaced it
+                return current
+            new_id = await self._create(agents_client, definition, key)
+            self._stats["agent_recreated"] += 1
+            self._agent_ids[key] = new_id
+            self._definitions[new_id] = definition
+            return new_id
+
+    async def create_and_process(self, agents_client, *, thread_id: str, agent_id: str, **kwargs: Any):
+        """
+        runs.create_and_process for a registry agent, re-creating the agent
+        once if it was deleted on the service side
+        """
+        try:
+            return await agents_client.runs.create_and_process(
+                thread_id=thread_id, agent_id=agent_id, **kwargs
+            )
+        except ResourceNotFoundError:
+            if agent_id not in self._definitions:
+                raise
+            print(f"⚠️ Agent {agent_id} disappeared, re-creating it")
+            agent_id = await self.recreate(agents_client, agent_id)
+            return await agents_client.runs.create_and_process(
+                thread_id=thread_id, agent_id=agent_id, **kwargs
+            )
@@ -1,61 +1,63 @@
 import os
 import time
+import asyncio
 import pandas as pd
 import io
-from typing import Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, Union
 from dotenv import load_dotenv
-from azure.ai.projects import AIProjectClient
-from azure.ai.agents import AgentsClient
-from azure.identity import DefaultAzureCredential, get_bearer_token_provider
 from azure.ai.agents.models import (
     BingGroundingTool,
-    FunctionTool,
-    ToolSet,
+    AsyncFunctionTool,
+    AsyncToolSet,
     ConnectedAgentTool,
 )
 from utils.user_functions import user_functions
+from services.clients import get_clients
+from services.analysis_cache import cache_key, content_hash, get_analysis_cache
+from services.excel_ingest import IngestLimitExceeded, read_workbook
+from services.data_digest import build_digest, dumps_digest
+from services.forecasting import build_forecast
 import json
-from openai import AzureOpenAI
 
 load_dotenv()
 
+# Bump whenever the analysis prompt or agent instructions change in a way that
+# should invalidate previously cached analyses
+ANALYSIS_PROMPT_VERSION = "3"
 
-def ai_analyze():
-    # Load project endpoint from .env
-    project_endpoint = os.environ["PROJECT_ENDPOINT"]
-
-    # Create an AIProjectClient instance
-    project_client = AIProjectClient(
-        endpoint=project_endpoint,
-        credential=DefaultAzureCredential(),
-    )
+# pandas/openpyxl parsing is CPU bound and stays synchronous, so it runs on a
+# small dedicated pool instead of the event loop thread.
+EXCEL_PARSE_WORKERS = int(os.environ.get("EXCEL_PARSE_WORKERS", "4"))
+_excel_executor = ThreadPoolExecutor(
+    max_workers=EXCEL_PARSE_WORKERS, thread_name_prefix="excel-parse"
+)
 
-    agents_client = AgentsClient(
-        endpoint=project_endpoint,
-        credential=DefaultAzureCredential(),
-    )
 
+async def ai_analyze():
     # Load Bing connection ID
     conn_id = os.environ["BING_CONNECTION_NAME"]
 
     # Initialize tools
     bing_tool = BingGroundingTool(connection_id=conn_id)
 
-    with agents_client:
-        agent = agents_client.create_agent(
+    clients = get_clients()
+    async with clients.agents() as agents_client:
+        agent_id = await clients.agents_registry.get_agent_id(
+            agents_client,
             model=os.environ["MODEL_DEPLOYMENT_NAME"],
             name="my-bing-agent",
             instructions="""You are a helpful assistant with web search capabilities.""",
             tools=bing_tool.definitions,
         )
-        print(f"✅ Created agent, ID: {agent.id}")
+        print(f"✅ Using agent, ID: {agent_id}")
 
         # Create a communication thread
-        thread = agents_client.threads.create()
+        thread = await agents_client.threads.create()
         print(f"✅ Created thread, ID: {thread.id}")
 
         # Add user message
-        message = agents_client.messages.create(
+        message = await agents_client.messages.create(
             thread_id=thread.id,
             role="user",
             # content="Search the News to day about agriculture in Thailand and answer me. Then give me datetime and weather",
@@ -64,14 +66,14 @@ def ai_analyze():
         print(f"✅ Created message, ID: {message['id']}")
 
         # Create and process a run for the agent to handle the message
-        run = agents_client.runs.create_and_process(
-            thread_id=thread.id, agent_id=agent.id
+        run = await clients.agents_registry.create_and_process(
+            agents_client, thread_id=thread.id, agent_id=agent_id
         )
         print(f"Created run, ID: {run.id}")
         print(f"Run status: {run.status}")
 
         run_steps = agents_client.run_steps.list(thread_id=thread.id, run_id=run.id)
-        for step in run_steps:
+        async for step in run_steps:
             print("STEP :", step)
             print(f"Step {step['id']} status: {step['status']}")
             step_details = step.get("step_details", {})
@@ -85,11 +87,7 @@ def ai_analyze():
         # Fetch and log all messages from the thread
         messages = agents_client.messages.list(thread_id=thread.id)
 
-        # Delete the agent after use
-        agents_client.delete_agent(agent.id)
-        print("Deleted agent")
-
-        for message in messages:
+        async for message in messages:
             # Extract text content from MessageTextContent/MessageTextDetails objects
             content = message["content"]
 
@@ -128,36 +126,24 @@ def ai_analyze():
             return [{"Role:": message["role"]}, {"Content:": text_content}]
 
 
-def ai():
-    # Load project endpoint from .env
-    project_endpoint = os.environ["PROJECT_ENDPOINT"]
-
-    # Create an AIProjectClient instance
-    project_client = AIProjectClient(
-        endpoint=project_endpoint,
-        credential=DefaultAzureCredential(),
-    )
-
-    agents_client = AgentsClient(
-        endpoint=project_endpoint,
-        credential=DefaultAzureCredential(),
-    )
-
+async def ai():
     # Load Bing connection ID
     conn_id = os.environ["BING_CONNECTION_NAME"]
 
     # Initialize tools
     bing_tool = BingGroundingTool(connection_id=conn_id)
 
-    functions = FunctionTool(functions=user_functions)
-    toolset = ToolSet()
+    functions = AsyncFunctionTool(functions=user_functions)
+    toolset = AsyncToolSet()
     toolset.add(bing_tool)
     toolset.add(functions)
 
-    agents_client.enable_auto_function_calls(toolset)
+    clients = get_clients()
+    async with clients.agents() as agents_client:
+        agents_client.enable_auto_function_calls(toolset)
 
-    with agents_client:
-        agent = agents_client.create_agent(
+        agent_id = await clients.agents_registry.get_agent_id(
+            agents_client,
             model=os.environ["MODEL_DEPLOYMENT_NAME"],
             name="my-bing-agent",
             instructions="""You are a helpful assistant with web search capabilities. 
@@ -177,14 +163,14 @@ def ai():
     """,
             toolset=toolset,
         )
-        print(f"✅ Created agent, ID: {agent.id}")
+        print(f"✅ Using agent, ID: {agent_id}")
 
         # Create a communication thread
-        thread = agents_client.threads.create()
+        thread = await agents_client.threads.create()
         print(f"✅ Created thread, ID: {thread.id}")
 
         # Add user message
-        message = agents_client.messages.create(
+        message = await agents_client.messages.create(
             thread_id=thread.id,
             role="user",
             # content="Search the News to day about agriculture in Thailand and answer me. Then give me datetime and weather",
@@ -193,14 +179,14 @@ def ai():
         print(f"✅ Created message, ID: {message['id']}")
 
         # Create and process a run for the agent to handle the message
-        run = agents_client.runs.create_and_process(
-            thread_id=thread.id, agent_id=agent.id
+        run = await clients.agents_registry.create_and_process(
+            agents_client, thread_id=thread.id, agent_id=agent_id
         )
         print(f"Created run, ID: {run.id}")
         print(f"Run status: {run.status}")
 
         run_steps = agents_client.run_steps.list(thread_id=thread.id, run_id=run.id)
-        for step in run_steps:
+        async for step in run_steps:
             print("STEP :", step)
             print(f"Step {step['id']} status: {step['status']}")
             step_details = step.get("step_details", {})
@@ -214,11 +200,7 @@ def ai():
         # Fetch and log all messages from the thread
         messages = agents_client.messages.list(thread_id=thread.id)
 
-        # Delete the agent after use
-        agents_client.delete_agent(agent.id)
-        print("Deleted agent")
-
-        for message in messages:
+        async for message in messages:
             # Extract text content from MessageTextContent/MessageTextDetails objects
             content = message["content"]
 
@@ -257,28 +239,79 @@ def ai():
             return [{"Role:": message["role"]}, {"Content:": text_content}]
 
 
-async def ai_analyze_excel_data(file_contents: bytes, filename: str) -> Dict[str, Any]:
+def read_excel_sheets(source: Union[bytes, str], filename: str = "") -> Dict[str, pd.DataFrame]:
+    """
+    Parse every sheet of an Excel workbook (raw bytes or a path) into a DataFrame.
+    .xlsx files are streamed row by row; legacy .xls goes through pandas.
+    """
+    if filename.lower().endswith(".xls"):
+        return pd.read_excel(io.BytesIO(source) if isinstance(source, bytes) else source, sheet_name=None)
+    return read_workbook(source)
+
+
+def prepare_workbook(source: Union[bytes, str], filename: str):
+    """
+    Parse a workbook into row records for the client, a token-bounded
+    statistical digest for the analysis prompt and the locally computed
+    monthly sales forecast (None when there is no dated sales history)
+    """
+    frames = read_excel_sheets(source, filename)
+
+    # Convert each sheet to JSON
+    excel_data = {sheet_name: df.to_dict('records') for sheet_name, df in frames.items()}
+
+    return excel_data, build_digest(frames, filename), build_forecast(frames)
+
+
+async def ai_analyze_excel_data(source: Union[bytes, str], filename: str, bypass_cache: bool = False,
+                                content_sha256: Optional[str] = None) -> Dict[str, Any]:
     """
-    Process Excel file and analyze data using AI for comprehensive business intelligence
+    Process Excel file and analyze data using AI for comprehensive business intelligence.
+    The workbook is either its raw bytes or the path of a spooled upload, in which
+    case content_sha256 must be given.
+    Results are cached by workbook content, so re-uploads of the same file are served
+    without another agent run unless bypass_cache is set.
     """
+    if content_sha256 is None:
+        content_sha256 = content_hash(source)
+    key = cache_key(content_sha256, os.environ.get("MODEL_DEPLOYMENT_NAME", ""), ANALYSIS_PROMPT_VERSION)
+    result = await get_analysis_cache().get_or_compute(
+        key,
+        lambda: _analyze_excel_data(source, filename),
+        bypass=bypass_cache,
+        cacheable=_is_cacheable,
+    )
+
+    # The same workbook may come back under a different name
+    ai_analysis = result["ai_analysis"]
+    data_processed = {**ai_analysis["data_processed"], "filename": filename}
+    return {**result, "ai_analysis": {**ai_analysis, "data_processed": data_processed}}
+
+
+def _is_cacheable(result: Dict[str, Any]) -> bool:
+    """Only cache analyses whose response is usable JSON"""
     try:
-        # Convert Excel to JSON (all sheets)
-        excel_data = {}
-        
-        # Read Excel file with all sheets
-        excel_file = pd.read_excel(io.BytesIO(file_contents), sheet_name=None)
-        
-        # Convert each sheet to JSON
-        for sheet_name, df in excel_file.items():
-            # Convert DataFrame to JSON
-            excel_data[sheet_name] = df.to_dict('records')
+        parsed = json.loads(result["ai_analysis"]["analysis_response"])
+    except (KeyError, TypeError, ValueError):
+        return False
+    return isinstance(parsed, dict) and "error" not in parsed
+
+
+async def _analyze_excel_data(source: Union[bytes, str], filename: str) -> Dict[str, Any]:
+    try:
+        # Convert Excel to JSON (all sheets) and digest it off the event loop
+        loop = asyncio.get_running_loop()
+        excel_data, digest, forecast = await loop.run_in_executor(
+            _excel_executor, prepare_workbook, source, filename
+        )
         
         # Prepare data summary for AI analysis
         data_summary = {
             "filename": filename,
             "sheets": list(excel_data.keys()),
             "total_sheets": len(excel_data),
-            "data": excel_data
+            "digest": digest,
+            "forecast": forecast
         }
         
         # Generate AI analysis
@@ -289,6 +322,8 @@ async def ai_analyze_excel_data(file_contents: bytes, filename: str) -> Dict[str
             "ai_analysis": analysis_result
         }
         
+    except IngestLimitExceeded:
+        raise
     except Exception as e:
         raise Exception(f"Error processing Excel data: {str(e)}")
 
@@ -297,20 +332,6 @@ async def analyze_business_data_with_ai(data_summary: Dict[str, Any]) -> Dict[st
     """
     Use AI to analyze business data and provide comprehensive insights
     """
-    # Load project endpoint from .env
-    project_endpoint = os.environ["PROJECT_ENDPOINT"]
-
-    # Create an AIProjectClient instance
-    project_client = AIProjectClient(
-        endpoint=project_endpoint,
-        credential=DefaultAzureCredential(),
-    )
-
-    agents_client = AgentsClient(
-        endpoint=project_endpoint,
-        credential=DefaultAzureCredential(),
-    )
-
     # Load Bing connection ID
     conn_id = os.environ["BING_CONNECTION_NAME"]
 
@@ -318,12 +339,12 @@ async def analyze_business_data_with_ai(data_summary: Dict[str, Any]) -> Dict[st
     bing_tool = BingGroundingTool(connection_id=conn_id)
 
     # Create comprehensive analysis prompt with improved JSON requirements
-    data_json = json.dumps(data_summary, indent=2, default=str)
+    data_json = dumps_digest(data_summary["digest"]) if "digest" in data_summary else json.dumps(data_summary, default=str)
     
     analysis_prompt = f"""
     You are an expert business intelligence analyst with advanced forecasting capabilities. Analyze the following Excel data and provide comprehensive insights with external factor analysis.
 
-    Excel Data:
+    Excel Data Digest (per sheet: column profiles, monthly/weekly rollups, trend and seasonality indicators, top-N labels; small sheets are included row by row under "data"):
     {data_json}
 
     **ANALYSIS REQUIREMENTS:**
@@ -361,6 +382,7 @@ async def analyze_business_data_with_ai(data_summary: Dict[str, Any]) -> Dict[st
        - Market intelligence specific to Thailand business environment
        - Actionable insights with specific timelines and numerical targets
 
+    {_forecast_prompt(data_summary.get("forecast"))}
     **CRITICAL JSON FORMAT REQUIREMENTS:**
     - Respond ONLY with a valid JSON object - no markdown, no code blocks, no extra text
     - Use double quotes for all strings, never single quotes
@@ -369,8 +391,10 @@ async def analyze_business_data_with_ai(data_summary: Dict[str, Any]) -> Dict[st
     - Base monthly forecasts on actual sales trends from the Excel data
     """
 
-    with agents_client:
-        agent = agents_client.create_agent(
+    clients = get_clients()
+    async with clients.agents() as agents_client:
+        agent_id = await clients.agents_registry.get_agent_id(
+            agents_client,
             model=os.environ["MODEL_DEPLOYMENT_NAME"],
             name="business-intelligence-agent",
             instructions="""You are an expert business intelligence analyst with web search capabilities.
@@ -551,18 +575,18 @@ async def analyze_business_data_with_ai(data_summary: Dict[str, Any]) -> Dict[st
         )
 
         # Create a communication thread
-        thread = agents_client.threads.create()
+        thread = await agents_client.threads.create()
 
         # Add user message with the analysis prompt
-        message = agents_client.messages.create(
+        message = await agents_client.messages.create(
             thread_id=thread.id,
             role="user",
             content=analysis_prompt,
         )
 
         # Create and process a run for the agent to handle the message
-        run = agents_client.runs.create_and_process(
-            thread_id=thread.id, agent_id=agent.id
+        run = await clients.agents_registry.create_and_process(
+            agents_client, thread_id=thread.id, agent_id=agent_id
         )
 
         # Get the analysis result with improved extraction
@@ -570,7 +594,7 @@ async def analyze_business_data_with_ai(data_summary: Dict[str, Any]) -> Dict[st
         
         # Extract the AI response with better error handling
         ai_response = ""
-        for message in messages:
+        async for message in messages:
             if message["role"] == "assistant":
                 content = message["content"]
                 if isinstance(content, list):
@@ -586,11 +610,8 @@ async def analyze_business_data_with_ai(data_summary: Dict[str, Any]) -> Dict[st
                                 ai_response += str(item["value"])
                 break
 
-        # Clean up
-        agents_client.delete_agent(agent.id)
-
         # Enhanced JSON validation and cleaning
-        ai_response = validate_json_openai(ai_response)
+        ai_response = await validate_json_openai(ai_response)
 
         # Additional validation to ensure proper JSON format
         try:
@@ -608,7 +629,7 @@ async def analyze_business_data_with_ai(data_summary: Dict[str, Any]) -> Dict[st
         except json.JSONDecodeError as e:
             print(f"JSON validation failed: {e}")
             # Fallback to a more aggressive cleaning approach
-            ai_response = validate_json_openai(ai_response)
+            ai_response = await validate_json_openai(ai_response)
             
             # Try once more to extract from nested structure
             try:
@@ -620,6 +641,9 @@ async def analyze_business_data_with_ai(data_summary: Dict[str, Any]) -> Dict[st
             except:
                 print("⚠️ Unable to extract from nested structure, using response as-is")
 
+        if data_summary.get("forecast"):
+            ai_response = _merge_forecast(ai_response, data_summary["forecast"])
+
         return {
             "analysis_response": ai_response,
             "data_processed": {
@@ -629,19 +653,39 @@ async def analyze_business_data_with_ai(data_summary: Dict[str, Any]) -> Dict[st
             }
         }
 
-def validate_json_openai(json_data: str):
+def _forecast_prompt(forecast: Optional[Dict[str, Any]]) -> str:
+    """Prompt section handing the locally computed forecast to the agent"""
+    if not forecast:
+        return ""
+    return f"""**SERVER-SIDE FORECAST (already computed from the uploaded sales data):**
+    {json.dumps(forecast, separators=(",", ":"))}
+    - Do NOT produce monthly figures yourself: return "monthly_forecasts" as an empty list, it is filled in from the forecast above
+    - Use the forecast model (trend, seasonality, volatility) for the sales_forecasting summary, key_insights and recommendations
+    - Spend your effort on external factors, risks, promotions, inventory and market intelligence
+"""
+
+
+def _merge_forecast(ai_response: str, forecast: Dict[str, Any]) -> str:
+    """Put the server-side monthly forecasts into the agent's JSON response"""
+    try:
+        parsed = json.loads(ai_response)
+    except json.JSONDecodeError:
+        return ai_response
+    if not isinstance(parsed, dict) or "error" in parsed:
+        return ai_response
+    sales_forecasting = parsed.get("sales_forecasting")
+    if not isinstance(sales_forecasting, dict):
+        sales_forecasting = parsed["sales_forecasting"] = {}
+    sales_forecasting["monthly_forecasts"] = forecast["monthly_forecasts"]
+    return json.dumps(parsed)
+
+
+async def validate_json_openai(json_data: str):
     endpoint = "https://tanakrit-mae-7711-resource.cognitiveservices.azure.com/"
     model_name = "gpt-4.1-mini"
     deployment = "gpt-4.1-mini"
-    token_provider = get_bearer_token_provider(DefaultAzureCredential(), "https://cognitiveservices.azure.com/.default")
     api_version = "2024-12-01-preview"
 
-    client = AzureOpenAI(
-        api_version=api_version,
-        azure_endpoint=endpoint,
-        azure_ad_token_provider=token_provider,
-    )
-
     # Pre-process the input to handle common issues
     cleaned_input = json_data.strip()
     
@@ -676,7 +720,9 @@ def validate_json_openai(json_data: str):
     except json.JSONDecodeError:
         print("🔄 Input needs AI validation and cleaning")
 
-    response = client.chat.completions.create(
+    client = get_clients().openai_client(endpoint, api_version)
+
+    response = await client.chat.completions.create(
         messages=[
             {
                 "role": "system",
@@ -0,0 +1,217 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+import datetime
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Awaitable, Callable
+
+ANALYSIS_CACHE_DIR = os.environ.get("ANALYSIS_CACHE_DIR", ".cache/analysis")
+ANALYSIS_CACHE_TTL = int(os.environ.get("ANALYSIS_CACHE_TTL", str(24 * 60 * 60)))
+ANALYSIS_CACHE_MAX_BYTES = int(os.environ.get("ANALYSIS_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+ANALYSIS_CACHE_MEMORY_ITEMS = int(os.environ.get("ANALYSIS_CACHE_MEMORY_ITEMS", "64"))
+
+
+def content_hash(file_contents: bytes) -> str:
+    """SHA-256 of an in-memory workbook, as spool_upload computes it for spooled ones"""
+    return hashlib.sha256(file_contents).hexdigest()
+
+
+def cache_key(content_sha256: str, *versions: str) -> str:
+    """
+    Content address for an analysis: the workbook's SHA-256 plus anything that
+    changes the answer for the same bytes (model, prompt version)
+    """
+    digest = hashlib.sha256(content_sha256.encode("ascii"))
+    for version in versions:
+        digest.update(b"\0" + version.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _json_default(value: Any) -> Any:
+    # Match how FastAPI renders dates so cached and fresh responses look alike
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    return str(value)
+
+
+class AnalysisCache:
+    """
+    Two-tier cache of finished analyses keyed by workbook content.
+
+    A small in-memory LRU serves repeat uploads on the same worker; a directory
+    of JSON files shared by all workers backs it, with a TTL and a total size
+    cap enforced by evicting the oldest entries.
+    """
+
+    def __init__(self, directory: str = ANALYSIS_CACHE_DIR, ttl: int = ANALYSIS_CACHE_TTL,
+                 max_bytes: int = ANALYSIS_CACHE_MAX_BYTES, memory_items: int = ANALYSIS_CACHE_MEMORY_ITEMS):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.memory_items = memory_items
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self.stats: Dict[str, int] = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "bypassed": 0,
+            "stores": 0,
+            "evictions": 0,
+        }
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _get_memory(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._memory.get(key)
+        if entry is None:
+            return None
+        stored_at, value = entry
+        if time.time() - stored_at > self.ttl:
+            del self._memory[key]
+            return None
+        self._memory.move_to_end(key)
+        return value
+
+    def _put_memory(self, key: str, value: Dict[str, Any], stored_at: float) -> None:
+        self._memory[key] = (stored_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def _read_disk(self, key: str) -> Optional[tuple]:
+        path = self._path(key)
+        try:
+            stored_at = os.path.getmtime(path)
+            if time.time() - stored_at > self.ttl:
+                os.remove(path)
+                return None
+            with open(path, "r", encoding="utf-8") as f:
+                return stored_at, json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_disk(self, key: str, payload: str) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f"{self._path(key)}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(payload)
+        os.replace(tmp_path, self._path(key))
+        self._evict_disk()
+
+    def _evict_disk(self) -> None:
+        """Drop expired files, then the oldest ones until under the size cap"""
+        now = time.time()
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if now - stat.st_mtime > self.ttl:
+                self._remove(path)
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    def _remove(self, path: str) -> None:
+        try:
+            os.remove(path)
+            self.stats["evictions"] += 1
+        except OSError:
+            pass
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        value = self._get_memory(key)
+        if value is not None:
+            self.stats["memory_hits"] += 1
+            return value
+
+        entry = await asyncio.to_thread(self._read_disk, key)
+        if entry is not None:
+            stored_at, value = entry
+            self.stats["disk_hits"] += 1
+            self._put_memory(key, value, stored_at)
+            return value
+        return None
+
+    async def put(self, key: str, value: Dict[str, Any]) -> Dict[str, Any]:
+        """Store a result and return it in the same JSON-safe form a cache hit would have"""
+        payload = json.dumps(value, default=_json_default)
+        value = json.loads(payload)
+        self._put_memory(key, value, time.time())
+        await asyncio.to_thread(self._write_disk, key, payload)
+        self.stats["stores"] += 1
+        return value
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[Dict[str, Any]]],
+                             bypass: bool = False,
+                             cacheable: Callable[[Dict[str, Any]], bool] = lambda value: True) -> Dict[str, Any]:
+        """
+        Return the cached result for key, or compute and store it. Identical
+        uploads that arrive while the first is still being analyzed wait for
+        that analysis instead of starting their own. With bypass the cache is
+        not read, but the fresh result still replaces the stored one.
+        """
+        if bypass:
+            self.stats["bypassed"] += 1
+        else:
+            value = await self.get(key)
+            if value is not None:
+                return value
+            pending = self._in_flight.get(key)
+            if pending is not None:
+                self.stats["coalesced"] += 1
+                return await asyncio.shield(pending)
+            self.stats["misses"] += 1
+
+        future = asyncio.get_running_loop().create_future()
+        if not bypass:
+            self._in_flight[key] = future
+        try:
+            value = await compute()
+            if cacheable(value):
+                value = await self.put(key, value)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Nobody else may be waiting; don't warn about an unretrieved exception
+            future.exception()
+            raise
+        finally:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        stats["hits"] = stats["memory_hits"] + stats["disk_hits"]
+        stats["memory_items"] = len(self._memory)
+        return stats
+
+
+_cache: Optional[AnalysisCache] = None
+
+
+def get_analysis_cache() -> AnalysisCache:
+    """Process-wide analysis cache"""
+    global _cache
+    if _cache is None:
+        _cache = AnalysisCache()
+    return _cache
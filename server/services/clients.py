@@ -0,0 +1,165 @@
+import os
+import time
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Optional, Tuple
+from azure.ai.agents.aio import AgentsClient
+from azure.core.credentials import AccessToken
+from azure.identity.aio import DefaultAzureCredential, get_bearer_token_provider
+from openai import AsyncAzureOpenAI
+from services.agent_registry import AgentRegistry
+
+# Refresh cached tokens this many seconds before they actually expire
+TOKEN_REFRESH_MARGIN = 300
+
+
+class CachedCredential:
+    """
+    Async token credential that shares one access token per scope set across
+    every client built on top of it and only goes back to the wrapped
+    credential chain when the cached token is close to expiry.
+    """
+
+    def __init__(self, credential: Any, stats: Dict[str, int]):
+        self._credential = credential
+        self._stats = stats
+        self._tokens: Dict[Tuple[str, ...], AccessToken] = {}
+        self._locks: Dict[Tuple[str, ...], asyncio.Lock] = {}
+
+    def _cached(self, key: Tuple[str, ...]) -> Optional[AccessToken]:
+        token = self._tokens.get(key)
+        if token and token.expires_on - TOKEN_REFRESH_MARGIN > time.time():
+            return token
+        return None
+
+    async def get_token(self, *scopes: str, **kwargs: Any) -> AccessToken:
+        # Tokens for claims challenges or other tenants are not shareable
+        if kwargs.get("claims") or kwargs.get("tenant_id"):
+            return await self._credential.get_token(*scopes, **kwargs)
+
+        key = tuple(sorted(scopes))
+        token = self._cached(key)
+        if token:
+            self._stats["token_cache_hits"] += 1
+            return token
+
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            # Another request may have refreshed it while we waited
+            token = self._cached(key)
+            if token:
+                self._stats["token_cache_hits"] += 1
+                return token
+            token = await self._credential.get_token(*scopes, **kwargs)
+            self._tokens[key] = token
+            self._stats["token_refreshes"] += 1
+            return token
+
+    async def close(self) -> None:
+        await self._credential.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_details: Any) -> None:
+        await self.close()
+
+
+class AzureClientRegistry:
+    """
+    Application-lifetime holder for the Azure credential and SDK clients.
+
+    Clients are created on first use and then reused by every request, so the
+    credential chain is probed once, tokens are cached and the underlying HTTP
+    connection pools stay warm.
+    """
+
+    def __init__(self):
+        self.stats: Dict[str, int] = {
+            "agents_client_created": 0,
+            "agents_client_reused": 0,
+            "openai_client_created": 0,
+            "openai_client_reused": 0,
+            "token_refreshes": 0,
+            "token_cache_hits": 0,
+        }
+        self.credential = CachedCredential(DefaultAzureCredential(), self.stats)
+        self._agents_clients: Dict[str, Any] = {}
+        self._openai_clients: Dict[Tuple[str, str], Any] = {}
+        self.agents_registry = AgentRegistry(self.stats)
+
+    def agents_client(self, endpoint: Optional[str] = None):
+        """Shared AgentsClient for a project endpoint (PROJECT_ENDPOINT by default)"""
+        endpoint = endpoint or os.environ["PROJECT_ENDPOINT"]
+        client = self._agents_clients.get(endpoint)
+        if client is None:
+            client = AgentsClient(endpoint=endpoint, credential=self.credential)
+            self._agents_clients[endpoint] = client
+            self.stats["agents_client_created"] += 1
+        else:
+            self.stats["agents_client_reused"] += 1
+        return client
+
+    @asynccontextmanager
+    async def agents(self, endpoint: Optional[str] = None):
+        """
+        Borrow the shared AgentsClient for the duration of a block. Unlike
+        ``async with AgentsClient(...)`` this leaves the client open for reuse.
+        """
+        yield self.agents_client(endpoint)
+
+    def openai_client(self, endpoint: str, api_version: str):
+        """Shared AsyncAzureOpenAI client authenticated with the cached credential"""
+        key = (endpoint, api_version)
+        client = self._openai_clients.get(key)
+        if client is None:
+            token_provider = get_bearer_token_provider(
+                self.credential, "https://cognitiveservices.azure.com/.default"
+            )
+            client = AsyncAzureOpenAI(
+                api_version=api_version,
+                azure_endpoint=endpoint,
+                azure_ad_token_provider=token_provider,
+            )
+            self._openai_clients[key] = client
+            self.stats["openai_client_created"] += 1
+        else:
+            self.stats["openai_client_reused"] += 1
+        return client
+
+    def get_stats(self) -> Dict[str, int]:
+        return dict(self.stats)
+
+    async def close(self) -> None:
+        for client in self._agents_clients.values():
+            await client.close()
+        for client in self._openai_clients.values():
+            await client.close()
+        self._agents_clients.clear()
+        self._openai_clients.clear()
+        await self.credential.close()
+
+
+_registry: Optional[AzureClientRegistry] = None
+
+
+def get_clients() -> AzureClientRegistry:
+    """
+    Return the process-wide client registry, creating it if the app lifespan
+    hook has not done so already (e.g. when services are used from a script).
+    """
+    global _registry
+    if _registry is None:
+        _registry = AzureClientRegistry()
+    return _registry
+
+
+async def startup() -> AzureClientRegistry:
+    return get_clients()
+
+
+async def shutdown() -> None:
+    global _registry
+    if _registry is not None:
+        await _registry.close()
+        _registry = None
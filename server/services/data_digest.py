@@ -0,0 +1,225 @@
+import os
+import json
+import warnings
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, List, Optional
+
+# Upper bound for the serialized digest that goes into the analysis prompt
+DIGEST_TOKEN_BUDGET = int(os.environ.get("DIGEST_TOKEN_BUDGET", "6000"))
+
+# Detail levels tried in order until the digest fits the token budget
+DIGEST_LEVELS: List[Dict[str, int]] = [
+    {"max_rows": 50, "months": 36, "weeks": 12, "top_n": 10, "top_values": 5},
+    {"max_rows": 20, "months": 24, "weeks": 8, "top_n": 5, "top_values": 3},
+    {"max_rows": 0, "months": 12, "weeks": 4, "top_n": 5, "top_values": 0},
+    {"max_rows": 0, "months": 6, "weeks": 0, "top_n": 3, "top_values": 0},
+]
+
+WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for English/JSON text (about 4 characters per token)"""
+    return len(text) // 4 + 1
+
+
+def _num(value: Any) -> Any:
+    """Plain, rounded Python number for JSON (None for NaN)"""
+    if value is None or pd.isna(value):
+        return None
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    value = float(value)
+    return int(value) if value.is_integer() else round(value, 2)
+
+
+def as_datetime(series: pd.Series) -> Optional[pd.Series]:
+    """Return the column as datetimes if it holds dates (natively or as text)"""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    if series.dtype != object:
+        return None
+    sample = series.dropna().head(50)
+    if sample.empty or not all(isinstance(v, str) for v in sample):
+        return None
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        if pd.to_datetime(sample, errors="coerce", format="mixed").notna().mean() < 0.9:
+            return None
+        return pd.to_datetime(series, errors="coerce", format="mixed")
+
+
+def _column_profile(series: pd.Series, dates: Optional[pd.Series], top_values: int) -> Dict[str, Any]:
+    profile: Dict[str, Any] = {"dtype": str(series.dtype), "missing": int(series.isna().sum())}
+    if dates is not None:
+        profile["kind"] = "date"
+        profile["min"] = str(dates.min().date()) if dates.notna().any() else None
+        profile["max"] = str(dates.max().date()) if dates.notna().any() else None
+    elif pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        profile["kind"] = "numeric"
+        described = series.describe()
+        for stat in ("min", "max", "mean", "std"):
+            profile[stat] = _num(described.get(stat))
+        profile["sum"] = _num(series.sum())
+    else:
+        profile["kind"] = "text"
+        profile["unique"] = int(series.nunique())
+        if top_values:
+            counts = series.value_counts().head(top_values)
+            profile["top_values"] = {str(k): int(v) for k, v in counts.items()}
+    return profile
+
+
+def _time_series(df: pd.DataFrame, date_col: str, dates: pd.Series, value_cols: List[str],
+                 months: int, weeks: int) -> Dict[str, Any]:
+    frame = df[value_cols].copy()
+    frame.index = dates
+    frame = frame[frame.index.notna()].sort_index()
+    if frame.empty:
+        return {}
+
+    # Calendar days with data, so partial months/weeks are recognizable
+    covered = pd.Series(1, index=frame.index.normalize().unique())
+    monthly_sum = frame.resample("MS").sum()
+    monthly_days = covered.resample("MS").sum().reindex(monthly_sum.index, fill_value=0)
+    result: Dict[str, Any] = {
+        "date_column": date_col,
+        "start": str(frame.index.min().date()),
+        "end": str(frame.index.max().date()),
+        "monthly": [
+            {"month": idx.strftime("%Y-%m"), "days": int(monthly_days[idx]),
+             **{col: _num(monthly_sum.at[idx, col]) for col in value_cols}}
+            for idx in monthly_sum.index[-months:]
+        ],
+    }
+    if weeks:
+        weekly_sum = frame.resample("W-SUN").sum()
+        weekly_days = covered.resample("W-SUN").sum().reindex(weekly_sum.index, fill_value=0)
+        result["weekly"] = [
+            {"week_ending": idx.strftime("%Y-%m-%d"), "days": int(weekly_days[idx]),
+             **{col: _num(weekly_sum.at[idx, col]) for col in value_cols}}
+            for idx in weekly_sum.index[-weeks:]
+        ]
+
+    # Trend: least-squares slope over full months, relative to the mean month
+    full_months = monthly_sum[monthly_days >= 28]
+    trends = {}
+    for col in value_cols:
+        values = full_months[col].to_numpy(dtype=float)
+        trend: Dict[str, Any] = {}
+        if len(values) >= 2 and values.mean():
+            slope = np.polyfit(np.arange(len(values)), values, 1)[0]
+            trend["monthly_slope"] = _num(slope)
+            trend["monthly_slope_pct"] = _num(100 * slope / values.mean())
+        daily = frame[col].resample("D").sum()
+        if len(daily) >= 60:
+            recent, previous = daily.iloc[-30:].sum(), daily.iloc[-60:-30].sum()
+            if previous:
+                trend["last_30_vs_prior_30_pct"] = _num(100 * (recent - previous) / previous)
+        trends[col] = trend
+    result["trend"] = trends
+
+    # Seasonality indices: average level per weekday / month relative to overall average
+    span_days = (frame.index.max() - frame.index.min()).days
+    primary = value_cols[0]
+    overall = frame[primary].mean()
+    if overall:
+        seasonality: Dict[str, Any] = {"column": primary}
+        if span_days >= 14:
+            by_weekday = frame[primary].groupby(frame.index.dayofweek).mean() / overall
+            seasonality["weekday_index"] = {WEEKDAYS[i]: _num(v) for i, v in by_weekday.items()}
+        if span_days >= 360:
+            by_month = frame[primary].groupby(frame.index.month).mean() / overall
+            seasonality["month_index"] = {MONTHS[i - 1]: _num(v) for i, v in by_month.items()}
+        if len(seasonality) > 1:
+            result["seasonality"] = seasonality
+    return result
+
+
+def _top_n(df: pd.DataFrame, label_col: str, value_cols: List[str], top_n: int) -> Dict[str, Any]:
+    grouped = df.groupby(label_col, sort=False)[value_cols].sum()
+    return {
+        col: [[str(label), _num(value)] for label, value in grouped[col].nlargest(top_n).items()]
+        for col in value_cols[:3]
+    }
+
+
+def _rows(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    return json.loads(df.to_json(orient="records", date_format="iso"))
+
+
+def digest_sheet(df: pd.DataFrame, level: Dict[str, int]) -> Dict[str, Any]:
+    """
+    Summarize one sheet with vectorized aggregates: column profiles, monthly and
+    weekly rollups, trend and seasonality indicators and top-N labels. Sheets
+    small enough are included verbatim since the rows are cheaper than stats.
+    """
+    digest: Dict[str, Any] = {"rows": int(len(df)), "columns": [str(c) for c in df.columns]}
+    if df.empty:
+        return digest
+    if len(df) <= level["max_rows"]:
+        digest["dtypes"] = {str(col): str(dtype) for col, dtype in df.dtypes.items()}
+        digest["data"] = _rows(df)
+        return digest
+
+    date_cols = {}
+    for col in df.columns:
+        dates = as_datetime(df[col])
+        if dates is not None:
+            date_cols[col] = dates
+
+    digest["profile"] = {
+        str(col): _column_profile(df[col], date_cols.get(col), level["top_values"]) for col in df.columns
+    }
+
+    numeric_cols = [
+        col for col in df.columns
+        if col not in date_cols
+        and pd.api.types.is_numeric_dtype(df[col])
+        and not pd.api.types.is_bool_dtype(df[col])
+        and "id" not in str(col).lower().split()
+    ]
+    if date_cols and numeric_cols:
+        date_col, dates = next(iter(date_cols.items()))
+        series = _time_series(df, str(date_col), dates, numeric_cols, level["months"], level["weeks"])
+        if series:
+            digest["time_series"] = series
+
+    label_cols = [
+        col for col in df.columns
+        if col not in date_cols and digest["profile"][str(col)]["kind"] == "text"
+    ]
+    if label_cols and numeric_cols:
+        label = label_cols[0]
+        digest["top_by"] = {"label_column": str(label), **_top_n(df, label, numeric_cols, level["top_n"])}
+    return digest
+
+
+def build_digest(frames: Dict[str, pd.DataFrame], filename: str,
+                 token_budget: int = DIGEST_TOKEN_BUDGET) -> Dict[str, Any]:
+    """
+    Build the prompt-ready digest of a workbook, lowering the detail level
+    until the serialized digest fits token_budget. If even the coarsest level
+    is too large, trailing sheets are left out and listed as omitted.
+    """
+    digest: Dict[str, Any] = {}
+    for level_index, level in enumerate(DIGEST_LEVELS):
+        sheets = {str(name): digest_sheet(df, level) for name, df in frames.items()}
+        digest = {"filename": filename, "detail_level": level_index, "sheets": sheets}
+        if estimate_tokens(dumps_digest(digest)) <= token_budget:
+            return digest
+
+    omitted = []
+    while len(digest["sheets"]) > 1 and estimate_tokens(dumps_digest(digest)) > token_budget:
+        name = list(digest["sheets"])[-1]
+        digest["sheets"].pop(name)
+        omitted.append(name)
+    digest["omitted_sheets"] = omitted[::-1]
+    return digest
+
+
+def dumps_digest(digest: Dict[str, Any]) -> str:
+    """Compact JSON for the prompt"""
+    return json.dumps(digest, separators=(",", ":"), ensure_ascii=False, default=str)
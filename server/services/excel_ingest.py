@@ -0,0 +1,190 @@
+import os
+import io
+import hashlib
+import asyncio
+import tempfile
+import warnings
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, List, Optional, Union
+from openpyxl import load_workbook
+from openpyxl.cell.cell import ERROR_CODES
+from pandas._libs.parsers import STR_NA_VALUES
+
+# Reject uploads / sheets beyond these sizes before doing any real work
+MAX_UPLOAD_BYTES = int(os.environ.get("MAX_UPLOAD_BYTES", str(100 * 1024 * 1024)))
+MAX_SHEET_ROWS = int(os.environ.get("MAX_SHEET_ROWS", "1000000"))
+# Rows held as Python objects before being packed into a typed DataFrame chunk
+INGEST_CHUNK_ROWS = int(os.environ.get("INGEST_CHUNK_ROWS", "20000"))
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+
+_NA_STRINGS = frozenset(STR_NA_VALUES) | frozenset(ERROR_CODES)
+
+
+class IngestLimitExceeded(Exception):
+    """The upload or one of its sheets is larger than the configured limits"""
+
+
+class SpooledUpload:
+    """An upload copied to a temporary file, with its size and SHA-256"""
+
+    def __init__(self, path: str, size: int, sha256: str):
+        self.path = path
+        self.size = size
+        self.sha256 = sha256
+
+    def cleanup(self) -> None:
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+async def spool_upload(upload: Any, max_bytes: Optional[int] = None) -> SpooledUpload:
+    """
+    Stream an UploadFile to a temporary file chunk by chunk, hashing as it
+    goes and failing as soon as max_bytes is exceeded, so the workbook is
+    never held in memory as a whole
+    """
+    max_bytes = max_bytes or MAX_UPLOAD_BYTES
+    suffix = os.path.splitext(upload.filename or "")[1]
+    fd, path = tempfile.mkstemp(prefix="upload-", suffix=suffix)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as f:
+            while True:
+                chunk = await upload.read(UPLOAD_CHUNK_BYTES)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise IngestLimitExceeded(
+                        f"File is larger than the {max_bytes // (1024 * 1024)} MB upload limit"
+                    )
+                digest.update(chunk)
+                await asyncio.to_thread(f.write, chunk)
+    except BaseException:
+        os.remove(path)
+        raise
+    return SpooledUpload(path, size, digest.hexdigest())
+
+
+def _convert(value: Any) -> Any:
+    # Same conversion pandas applies to every openpyxl cell
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def _cell(value: Any) -> Any:
+    # Data cells additionally map the default NA strings and error codes to NaN
+    if isinstance(value, str) and value in _NA_STRINGS:
+        return np.nan
+    return _convert(value)
+
+
+def _column_names(header: List[Any], width: int) -> List[Any]:
+    """Header row to column labels the way read_excel names them"""
+    names = []
+    seen: Dict[Any, int] = {}
+    for i in range(width):
+        name = header[i] if i < len(header) else None
+        if name is None or (isinstance(name, str) and name == ""):
+            name = f"Unnamed: {i}"
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def _chunk_frame(rows: List[List[Any]]) -> pd.DataFrame:
+    frame = pd.DataFrame(rows)
+    rows.clear()
+    return frame
+
+
+def read_sheet(ws, max_rows: Optional[int] = None, chunk_rows: int = INGEST_CHUNK_ROWS) -> pd.DataFrame:
+    """
+    Stream one read-only worksheet into a DataFrame. Rows are converted to
+    typed DataFrame chunks every chunk_rows rows, so only one chunk at a time
+    exists as boxed Python values.
+    """
+    max_rows = max_rows or MAX_SHEET_ROWS
+    ws.reset_dimensions()
+    header: Optional[List[Any]] = None
+    width = 0
+    count = 0
+    buffer: List[List[Any]] = []
+    chunks: List[pd.DataFrame] = []
+
+    # Blank rows inside the data become all-NaN rows, trailing ones are dropped
+    blank = 0
+
+    for values in ws.iter_rows(values_only=True):
+        if header is None:
+            header = [_convert(v) for v in values]
+            while header and (header[-1] is None or header[-1] == ""):
+                header.pop()
+            width = len(header)
+            continue
+        row = [_cell(v) for v in values]
+        while row and (row[-1] is None or row[-1] == ""):
+            row.pop()
+        if not row:
+            blank += 1
+            continue
+        count += blank + 1
+        if count > max_rows:
+            raise IngestLimitExceeded(f"Sheet '{ws.title}' has more than {max_rows} rows")
+        buffer.extend([] for _ in range(blank))
+        blank = 0
+        width = max(width, len(row))
+        buffer.append(row)
+        if len(buffer) >= chunk_rows:
+            chunks.append(_chunk_frame(buffer))
+
+    if buffer:
+        chunks.append(_chunk_frame(buffer))
+    if header is None:
+        return pd.DataFrame()
+
+    columns = _column_names(header, width)
+    if not chunks:
+        return pd.DataFrame(columns=columns)
+    with warnings.catch_warnings():
+        # Chunks where a column is entirely empty must not decide its dtype,
+        # which is the concat behaviour pinned pandas still has
+        warnings.simplefilter("ignore", FutureWarning)
+        df = pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0]
+    df = df.reindex(columns=range(width))
+    df.columns = columns
+
+    # Empty cells in text columns are NaN in read_excel, not None
+    object_cols = df.columns[df.dtypes == object]
+    if len(object_cols):
+        with pd.option_context("future.no_silent_downcasting", True):
+            df[object_cols] = df[object_cols].fillna(np.nan).infer_objects()
+    return df
+
+
+def read_workbook(source: Union[str, bytes], max_rows: Optional[int] = None) -> Dict[str, pd.DataFrame]:
+    """
+    Parse every sheet of an .xlsx workbook (a path or the raw bytes) with
+    openpyxl in read-only mode. Row limits are checked against the sheet
+    dimensions up front and enforced again while streaming.
+    """
+    max_rows = max_rows or MAX_SHEET_ROWS
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    wb = load_workbook(source, read_only=True, data_only=True, keep_links=False)
+    try:
+        for ws in wb.worksheets:
+            if ws.max_row and ws.max_row - 1 > max_rows:
+                raise IngestLimitExceeded(f"Sheet '{ws.title}' has more than {max_rows} rows")
+        return {ws.title: read_sheet(ws, max_rows) for ws in wb.worksheets}
+    finally:
+        wb.close()
@@ -0,0 +1,165 @@
+import re
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, List, Optional, Tuple
+from services.data_digest import as_datetime
+
+FORECAST_HORIZON = 12
+
+# Scenario floors from the analysis contract: best case at least +30%,
+# worst case at least -40% around the most likely figure
+BEST_CASE_MIN = 0.30
+WORST_CASE_MIN = 0.40
+# Monthly damping of the trend so long horizons don't run away
+TREND_DAMPING = 0.9
+# z-score for an 80% two-sided band
+BAND_Z = 1.2816
+
+SALES_COLUMN = re.compile(r"sales|revenue", re.IGNORECASE)
+NOT_ACTUALS = re.compile(r"predict|forecast|target|budget", re.IGNORECASE)
+
+
+def find_sales_series(frames: Dict[str, pd.DataFrame]) -> Optional[Tuple[str, str, pd.Series]]:
+    """
+    Pick the sales history with the most distinct days across all sheets and
+    return (sheet, column, daily totals indexed by date)
+    """
+    best = None
+    for sheet_name, df in frames.items():
+        if df.empty:
+            continue
+        dates = None
+        for col in df.columns:
+            dates = as_datetime(df[col])
+            if dates is not None:
+                break
+        if dates is None:
+            continue
+        for col in df.columns:
+            if not (SALES_COLUMN.search(str(col)) and not NOT_ACTUALS.search(str(col))):
+                continue
+            if not pd.api.types.is_numeric_dtype(df[col]):
+                continue
+            values = pd.Series(df[col].to_numpy(dtype=float), index=pd.DatetimeIndex(dates))
+            values = values[values.index.notna() & values.notna()]
+            if values.empty:
+                continue
+            daily = values.groupby(values.index.normalize()).sum()
+            if best is None or len(daily) > len(best[2]):
+                best = (str(sheet_name), str(col), daily)
+    return best
+
+
+def _seasonal_indices(rate: pd.Series, months: np.ndarray) -> Tuple[np.ndarray, str]:
+    """Multiplicative month-of-year indices, normalized to average 1"""
+    seasonal = np.ones(12)
+    n = len(rate)
+    if n >= 24:
+        # Classical decomposition: ratio to a centered 2x12 moving average
+        centered = rate.rolling(12).mean().rolling(2).mean().shift(-6)
+        ratio = (rate / centered).to_numpy()
+        valid = ~np.isnan(ratio)
+        sums = np.bincount(months[valid] - 1, weights=ratio[valid], minlength=12)
+        counts = np.bincount(months[valid] - 1, minlength=12)
+        observed = counts > 0
+        seasonal[observed] = sums[observed] / counts[observed]
+        method = "trend+seasonal"
+    elif n >= 12:
+        # One observation per month: detrend linearly and damp the indices by half
+        t = np.arange(n)
+        fit = np.polyval(np.polyfit(t, rate.to_numpy(), 1), t)
+        ratio = rate.to_numpy() / np.where(fit == 0, np.nan, fit)
+        valid = ~np.isnan(ratio)
+        sums = np.bincount(months[valid] - 1, weights=ratio[valid], minlength=12)
+        counts = np.bincount(months[valid] - 1, minlength=12)
+        observed = counts > 0
+        seasonal[observed] = 1 + 0.5 * (sums[observed] / counts[observed] - 1)
+        method = "trend+damped-seasonal"
+    else:
+        method = "trend"
+    return seasonal / seasonal.mean(), method
+
+
+def forecast_monthly(daily: pd.Series, horizon: int = FORECAST_HORIZON) -> Dict[str, Any]:
+    """
+    Forecast monthly totals for the months after the last observed one.
+
+    Works on the average sales per observed day of each month, so partial
+    first/last months do not distort the level. The per-day rate is split into
+    month-of-year seasonality and a damped linear trend; scenario bands widen
+    with residual volatility and horizon, and confidence decays over time.
+    """
+    periods = daily.index.to_period("M")
+    grouped = daily.groupby(periods)
+    rate = grouped.sum() / grouped.size()
+    coverage = grouped.size().to_numpy(dtype=float)
+    months = rate.index.month.to_numpy()
+    n = len(rate)
+
+    seasonal, method = _seasonal_indices(rate, months)
+    deseasonalized = rate.to_numpy() / seasonal[months - 1]
+    t = np.arange(n)
+    if n >= 3:
+        slope, intercept = np.polyfit(t, deseasonalized, 1, w=np.sqrt(coverage))
+        fitted = (intercept + slope * t) * seasonal[months - 1]
+        residuals = rate.to_numpy() / np.where(fitted == 0, np.nan, fitted) - 1
+        sigma = float(np.nanstd(residuals, ddof=1))
+    else:
+        slope, intercept = 0.0, float(np.average(deseasonalized, weights=coverage))
+        sigma = 0.15
+    if not np.isfinite(sigma):
+        sigma = 0.15
+
+    steps = np.arange(1, horizon + 1)
+    damped_steps = np.cumsum(TREND_DAMPING ** steps)
+    level = intercept + slope * (n - 1)
+    future = pd.period_range(rate.index[-1] + 1, periods=horizon, freq="M")
+    future_months = future.month.to_numpy()
+    daily_rate = np.maximum(level + slope * damped_steps, 0) * seasonal[future_months - 1]
+    most_likely = daily_rate * future.days_in_month.to_numpy()
+
+    spread = BAND_Z * sigma * np.sqrt(steps)
+    best_case = most_likely * (1 + np.maximum(BEST_CASE_MIN, spread))
+    worst_case = most_likely * (1 - np.minimum(0.9, np.maximum(WORST_CASE_MIN, spread)))
+    confidence = 90 - 20 * (steps - 1) / max(horizon - 1, 1) - min(15.0, 50 * sigma)
+    confidence = np.clip(np.round(confidence), 50, 95)
+
+    forecasts: List[Dict[str, Any]] = [
+        {
+            "month": period.strftime("%B %Y"),
+            "most_likely": int(round(ml)),
+            "best_case": int(round(best)),
+            "worst_case": int(round(worst)),
+            "confidence": int(conf),
+        }
+        for period, ml, best, worst, conf in zip(future, most_likely, best_case, worst_case, confidence)
+    ]
+    mean_rate = float(np.mean(deseasonalized)) or 1.0
+    return {
+        "model": {
+            "method": method,
+            "history_months": n,
+            "history_days": int(len(daily)),
+            "trend_pct_per_month": round(100 * float(slope) / mean_rate, 2),
+            "volatility_pct": round(100 * sigma, 2),
+            "seasonal_index": {
+                period.strftime("%b"): round(float(seasonal[period.month - 1]), 3)
+                for period in pd.period_range("2000-01", periods=12, freq="M")
+            },
+        },
+        "monthly_forecasts": forecasts,
+    }
+
+
+def build_forecast(frames: Dict[str, pd.DataFrame], horizon: int = FORECAST_HORIZON) -> Optional[Dict[str, Any]]:
+    """
+    Server-side sales_forecasting.monthly_forecasts for a workbook, or None
+    when no sheet has a dated sales column to forecast from
+    """
+    found = find_sales_series(frames)
+    if found is None:
+        return None
+    sheet_name, column, daily = found
+    forecast = forecast_monthly(daily, horizon)
+    forecast["source"] = {"sheet": sheet_name, "column": column}
+    return forecast
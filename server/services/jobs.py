@@ -0,0 +1,315 @@
+import os
+import json
+import time
+import uuid
+import shutil
+import sqlite3
+import asyncio
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, Awaitable, Callable, Iterator, List
+
+JOBS_DIR = os.environ.get("JOBS_DIR", ".cache/jobs")
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "2"))
+# How often idle workers look for jobs queued by other processes
+JOB_POLL_INTERVAL = float(os.environ.get("JOB_POLL_INTERVAL", "1.0"))
+# A running job whose worker has not checked in for this long is requeued
+JOB_STALE_AFTER = float(os.environ.get("JOB_STALE_AFTER", "60"))
+JOB_RETENTION = int(os.environ.get("JOB_RETENTION", str(7 * 24 * 60 * 60)))
+JOB_MAX_ATTEMPTS = int(os.environ.get("JOB_MAX_ATTEMPTS", "3"))
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = "queued", "running", "succeeded", "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    stage TEXT,
+    filename TEXT NOT NULL,
+    workbook_path TEXT,
+    content_sha256 TEXT,
+    bypass_cache INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    heartbeat_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at);
+"""
+
+
+class JobStore:
+    """
+    Analysis jobs in a SQLite database next to their spooled workbooks, so
+    queued and finished jobs outlive the worker that accepted them and every
+    worker process sharing the directory sees the same jobs
+    """
+
+    def __init__(self, directory: str = JOBS_DIR):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.db_path = os.path.join(directory, "jobs.sqlite3")
+        with self._connect() as db:
+            db.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # Autocommit connection per operation, so the store is safe to use from any thread
+        db = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        try:
+            db.row_factory = sqlite3.Row
+            db.execute("PRAGMA journal_mode=WAL")
+            yield db
+        finally:
+            db.close()
+
+    def create(self, workbook_path: str, filename: str, content_sha256: str, bypass_cache: bool = False) -> str:
+        """Take ownership of a spooled workbook and queue a job for it"""
+        job_id = uuid.uuid4().hex
+        stored_path = os.path.join(self.directory, f"{job_id}{os.path.splitext(filename)[1]}")
+        shutil.move(workbook_path, stored_path)
+        with self._connect() as db:
+            db.execute(
+                "INSERT INTO jobs (id, status, filename, workbook_path, content_sha256, bypass_cache, created_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, QUEUED, filename, stored_path, content_sha256, int(bypass_cache), time.time()),
+            )
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._connect() as db:
+            row = db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row is not None else None
+
+    def claim(self) -> Optional[Dict[str, Any]]:
+        """Atomically move the oldest queued job to running and return it"""
+        now = time.time()
+        with self._connect() as db:
+            row = db.execute(
+                "UPDATE jobs SET status = ?, stage = NULL, attempts = attempts + 1, started_at = ?, heartbeat_at = ?"
+                " WHERE id = (SELECT id FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1) AND status = ?"
+                " RETURNING *",
+                (RUNNING, now, now, QUEUED, QUEUED),
+            ).fetchone()
+        return dict(row) if row is not None else None
+
+    def heartbeat(self, job_ids: List[str]) -> None:
+        if not job_ids:
+            return
+        with self._connect() as db:
+            db.execute(
+                f"UPDATE jobs SET heartbeat_at = ? WHERE id IN ({','.join('?' * len(job_ids))})",
+                (time.time(), *job_ids),
+            )
+
+    def set_stage(self, job_id: str, stage: str) -> None:
+        with self._connect() as db:
+            db.execute("UPDATE jobs SET stage = ?, heartbeat_at = ? WHERE id = ?", (stage, time.time(), job_id))
+
+    def finish(self, job_id: str, result: Optional[Dict[str, Any]] = None, error: Optional[str] = None) -> None:
+        """Record the outcome and drop the workbook, which is no longer needed"""
+        job = self.get(job_id)
+        with self._connect() as db:
+            db.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, workbook_path = NULL WHERE id = ?",
+                (FAILED if error is not None else SUCCEEDED,
+                 json.dumps(result, default=str) if result is not None else None,
+                 error, time.time(), job_id),
+            )
+        if job and job["workbook_path"]:
+            _remove(job["workbook_path"])
+
+    def requeue_stale(self, stale_after: float = JOB_STALE_AFTER, max_attempts: int = JOB_MAX_ATTEMPTS) -> int:
+        """
+        Put running jobs whose worker stopped checking in (crash, restart) back
+        in the queue, or fail them once they have used up their attempts
+        """
+        cutoff = time.time() - stale_after
+        with self._connect() as db:
+            stale = db.execute(
+                "SELECT id, attempts FROM jobs WHERE status = ? AND heartbeat_at < ?", (RUNNING, cutoff)
+            ).fetchall()
+        requeued = 0
+        for row in stale:
+            if row["attempts"] >= max_attempts:
+                self.finish(row["id"], error="Job was interrupted too many times")
+                continue
+            self.requeue([row["id"]])
+            requeued += 1
+        return requeued
+
+    def requeue(self, job_ids: List[str]) -> None:
+        with self._connect() as db:
+            for job_id in job_ids:
+                db.execute("UPDATE jobs SET status = ?, stage = NULL WHERE id = ? AND status = ?",
+                           (QUEUED, job_id, RUNNING))
+
+    def purge(self, older_than: float = JOB_RETENTION) -> int:
+        """Forget finished jobs past the retention period"""
+        with self._connect() as db:
+            cursor = db.execute("DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?",
+                                (SUCCEEDED, FAILED, time.time() - older_than))
+        return cursor.rowcount
+
+    def counts(self) -> Dict[str, int]:
+        with self._connect() as db:
+            rows = db.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        return {row["status"]: row["n"] for row in rows}
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def job_view(job: Dict[str, Any]) -> Dict[str, Any]:
+    """The public shape of a job for the status endpoint"""
+    view = {
+        "job_id": job["id"],
+        "status": job["status"],
+        "stage": job["stage"],
+        "filename": job["filename"],
+        "attempts": job["attempts"],
+        "created_at": job["created_at"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"],
+    }
+    if job["status"] == SUCCEEDED:
+        view["result"] = json.loads(job["result"])
+    elif job["status"] == FAILED:
+        view["error"] = job["error"]
+    return view
+
+
+JobHandler = Callable[[Dict[str, Any], Callable[[str], Awaitable[None]]], Awaitable[Dict[str, Any]]]
+
+
+async def run_analysis_job(job: Dict[str, Any], set_stage: Callable[[str], Awaitable[None]]) -> Dict[str, Any]:
+    """Analyze a job's workbook and return the same body as the synchronous endpoint"""
+    from services.ai_services import ai_analyze_excel_data
+
+    await set_stage("analyzing")
+    analysis_result = await ai_analyze_excel_data(
+        job["workbook_path"], job["filename"],
+        bypass_cache=bool(job["bypass_cache"]), content_sha256=job["content_sha256"],
+    )
+    return {
+        "message": "Excel file analyzed successfully",
+        "filename": job["filename"],
+        "analysis": analysis_result,
+    }
+
+
+class JobRunner:
+    """
+    A fixed pool of asyncio workers draining the job store. Workers are woken
+    right away for jobs submitted to this process and poll for jobs queued by
+    others; a heartbeat task keeps their running jobs from being considered
+    stale.
+    """
+
+    def __init__(self, store: JobStore, handler: JobHandler = run_analysis_job, workers: int = JOB_WORKERS,
+                 poll_interval: float = JOB_POLL_INTERVAL, stale_after: float = JOB_STALE_AFTER):
+        self.store = store
+        self.handler = handler
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self._wakeup = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+        self._running: Dict[str, asyncio.Task] = {}
+
+    async def start(self) -> None:
+        await asyncio.to_thread(self.store.requeue_stale, self.stale_after)
+        await asyncio.to_thread(self.store.purge)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._heartbeat()))
+
+    async def stop(self) -> None:
+        """Stop the workers and put their interrupted jobs back in the queue"""
+        interrupted = list(self._running)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await asyncio.to_thread(self.store.requeue, interrupted)
+
+    async def submit(self, workbook_path: str, filename: str, content_sha256: str,
+                     bypass_cache: bool = False) -> Dict[str, Any]:
+        if not self._tasks:
+            # Used outside the app lifespan (scripts, tests)
+            await self.start()
+        job_id = await asyncio.to_thread(self.store.create, workbook_path, filename, content_sha256, bypass_cache)
+        self._wakeup.set()
+        return await self.get(job_id)
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self.store.get, job_id)
+
+    async def _worker(self) -> None:
+        while True:
+            job = await asyncio.to_thread(self.store.claim)
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run(job)
+
+    async def _run(self, job: Dict[str, Any]) -> None:
+        job_id = job["id"]
+
+        async def set_stage(stage: str) -> None:
+            await asyncio.to_thread(self.store.set_stage, job_id, stage)
+
+        self._running[job_id] = asyncio.current_task()
+        try:
+            result = await self.handler(job, set_stage)
+        except asyncio.CancelledError:
+            # Shutting down: stop() requeues the job
+            raise
+        except Exception as e:
+            await asyncio.to_thread(self.store.finish, job_id, None, str(e))
+        else:
+            await asyncio.to_thread(self.store.finish, job_id, result)
+        finally:
+            self._running.pop(job_id, None)
+
+    async def _heartbeat(self) -> None:
+        while True:
+            await asyncio.sleep(self.stale_after / 4)
+            await asyncio.to_thread(self.store.heartbeat, list(self._running))
+            await asyncio.to_thread(self.store.requeue_stale, self.stale_after)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"workers": self.workers, "running_here": len(self._running), "jobs": self.store.counts()}
+
+
+_runner: Optional[JobRunner] = None
+
+
+def get_job_runner() -> JobRunner:
+    """Process-wide job runner over the shared job store"""
+    global _runner
+    if _runner is None:
+        _runner = JobRunner(JobStore())
+    return _runner
+
+
+async def startup() -> JobRunner:
+    runner = get_job_runner()
+    await runner.start()
+    return runner
+
+
+async def shutdown() -> None:
+    global _runner
+    if _runner is not None:
+        await _runner.stop()
+        _runner = None
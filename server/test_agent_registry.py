@@ -0,0 +1,75 @@
+import asyncio
+
+from internal import fake_agents
+from services import ai_services, clients
+
+
+def _data_summary():
+    return {
+        "filename": "data.xlsx",
+        "sheets": ["Sheet1"],
+        "total_sheets": 1,
+        "data": {"Sheet1": [{"Date": "2025-01-01", "Daily Sales (THB)": 1200}]},
+    }
+
+
+def test_agent_is_created_once_and_reused(monkeypatch):
+    settings = fake_agents.install(monkeypatch)
+    settings.run_latency = 0.01
+
+    async def main():
+        await asyncio.gather(
+            *(ai_services.analyze_business_data_with_ai(_data_summary()) for _ in range(5))
+        )
+
+    asyncio.run(main())
+
+    stats = clients.get_clients().get_stats()
+    assert settings.calls["create_agent"] == 1
+    assert "delete_agent" not in settings.calls
+    assert stats["agent_created"] == 1
+    assert stats["agent_reused"] == 4
+
+
+def test_agent_is_adopted_by_a_new_worker(monkeypatch):
+    settings = fake_agents.install(monkeypatch)
+    settings.run_latency = 0.01
+
+    asyncio.run(ai_services.analyze_business_data_with_ai(_data_summary()))
+    # A fresh registry stands in for another worker process
+    monkeypatch.setattr(clients, "_registry", None)
+    asyncio.run(ai_services.analyze_business_data_with_ai(_data_summary()))
+
+    assert settings.calls["create_agent"] == 1
+    assert clients.get_clients().get_stats()["agent_adopted"] == 1
+
+
+def test_changed_definition_or_deleted_agent_gets_a_new_agent(monkeypatch):
+    settings = fake_agents.install(monkeypatch)
+    registry = clients.get_clients()
+    agents_client = registry.agents_client()
+    definition = {"model": "fake-model", "name": "bi-agent", "instructions": "v1"}
+
+    async def main():
+        first = await registry.agents_registry.get_agent_id(agents_client, **definition)
+        same = await registry.agents_registry.get_agent_id(agents_client, **definition)
+        changed = await registry.agents_registry.get_agent_id(
+            agents_client, **{**definition, "instructions": "v2"}
+        )
+
+        thread = await agents_client.threads.create()
+        await agents_client.delete_agent(first)
+        run = await registry.agents_registry.create_and_process(
+            agents_client, thread_id=thread.id, agent_id=first
+        )
+        replacement = await registry.agents_registry.get_agent_id(agents_client, **definition)
+        return first, same, changed, run, replacement
+
+    first, same, changed, run, replacement = asyncio.run(main())
+
+    assert first == same
+    assert changed != first
+    assert run.status == "completed"
+    assert replacement not in (first, changed)
+    assert run.agent_id == replacement
+    assert registry.stats["agent_recreated"] == 1
@@ -0,0 +1,87 @@
+import os
+import time
+import asyncio
+
+import httpx
+
+from internal import fake_agents
+from services import analysis_cache
+from services.analysis_cache import AnalysisCache
+
+
+def _post_workbook(app, path, url="/ai/analyze-excel/", times=1):
+    with open(path, "rb") as f:
+        workbook = f.read()
+
+    async def main():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            responses = []
+            for _ in range(times):
+                files = {"file": (os.path.basename(path), workbook, "application/vnd.ms-excel")}
+                responses.append(await client.post(url, files=files))
+            return responses
+
+    return asyncio.run(main())
+
+
+def test_reupload_is_served_from_cache(monkeypatch, tmp_path):
+    from main import app
+
+    settings = fake_agents.install(monkeypatch)
+    settings.run_latency = 0.01
+    cache = AnalysisCache(directory=str(tmp_path))
+    monkeypatch.setattr(analysis_cache, "_cache", cache)
+
+    first, second = _post_workbook(app, "data.xlsx", times=2)
+    assert first.status_code == second.status_code == 200
+    assert first.json() == second.json()
+    assert settings.calls["runs.create_and_process"] == 1
+    assert cache.get_stats()["memory_hits"] == 1
+
+    # A new worker has an empty memory tier but shares the disk tier
+    monkeypatch.setattr(analysis_cache, "_cache", AnalysisCache(directory=str(tmp_path)))
+    (third,) = _post_workbook(app, "data.xlsx")
+    assert third.json() == first.json()
+    assert analysis_cache.get_analysis_cache().get_stats()["disk_hits"] == 1
+
+    (bypassed,) = _post_workbook(app, "data.xlsx", url="/ai/analyze-excel/?bypass_cache=true")
+    assert bypassed.status_code == 200
+    assert settings.calls["runs.create_and_process"] == 2
+
+
+def test_concurrent_identical_requests_share_one_computation(tmp_path):
+    cache = AnalysisCache(directory=str(tmp_path))
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"value": 1}
+
+    async def main():
+        return await asyncio.gather(*(cache.get_or_compute("k", compute) for _ in range(5)))
+
+    results = asyncio.run(main())
+    assert results == [{"value": 1}] * 5
+    assert len(calls) == 1
+    assert cache.get_stats()["coalesced"] == 4
+
+
+def test_disk_tier_expires_and_evicts_oldest(tmp_path):
+    cache = AnalysisCache(directory=str(tmp_path), ttl=60, max_bytes=250, memory_items=1)
+
+    async def fill():
+        for i in range(5):
+            await cache.put(f"key{i}", {"payload": "x" * 80, "i": i})
+
+    asyncio.run(fill())
+    # Each entry is ~100 bytes, so only the two newest fit
+    remaining = sorted(os.listdir(tmp_path))
+    assert remaining == ["key3.json", "key4.json"]
+
+    # Age key3 past the TTL
+    old = time.time() - 120
+    os.utime(tmp_path / "key3.json", (old, old))
+    assert asyncio.run(cache.get("key3")) is None
+    assert asyncio.run(cache.get("key4")) == {"payload": "x" * 80, "i": 4}
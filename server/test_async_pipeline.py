@@ -0,0 +1,79 @@
+import asyncio
+import time
+
+import httpx
+
+from internal import fake_agents
+from services import ai_services, analysis_cache
+
+
+def _data_summary():
+    return {
+        "filename": "data.xlsx",
+        "sheets": ["Sheet1"],
+        "total_sheets": 1,
+        "data": {"Sheet1": [{"Date": "2025-01-01", "Daily Sales (THB)": 1200}]},
+    }
+
+
+def test_analyses_overlap_instead_of_queueing(monkeypatch):
+    """
+    Concurrent analyses should take about as long as one run, not the sum of all runs
+    """
+    settings = fake_agents.install(monkeypatch)
+    settings.run_latency = 0.1
+    n = 10
+
+    async def serial():
+        for _ in range(n):
+            await ai_services.analyze_business_data_with_ai(_data_summary())
+
+    async def concurrent():
+        return await asyncio.gather(
+            *(ai_services.analyze_business_data_with_ai(_data_summary()) for _ in range(n))
+        )
+
+    start = time.perf_counter()
+    asyncio.run(serial())
+    serial_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = asyncio.run(concurrent())
+    concurrent_elapsed = time.perf_counter() - start
+
+    print(f"serial: {serial_elapsed:.2f}s, concurrent: {concurrent_elapsed:.2f}s")
+    assert len(results) == n
+    assert all('"sales_forecasting"' in r["analysis_response"] for r in results)
+    assert serial_elapsed / concurrent_elapsed >= 4
+
+
+def test_upload_endpoint_serves_uploads_concurrently(monkeypatch, tmp_path):
+    """
+    The event loop must stay free while an upload is being analyzed
+    """
+    from main import app
+
+    settings = fake_agents.install(monkeypatch)
+    monkeypatch.setattr(analysis_cache, "_cache", analysis_cache.AnalysisCache(directory=str(tmp_path)))
+    settings.run_latency = 0.5
+    with open("data.xlsx", "rb") as f:
+        workbook = f.read()
+
+    async def upload(client):
+        files = {"file": ("data.xlsx", workbook, "application/vnd.ms-excel")}
+        # Same workbook every time, so skip the result cache
+        return await client.post("/ai/analyze-excel/?bypass_cache=true", files=files)
+
+    async def main():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            start = time.perf_counter()
+            responses = await asyncio.gather(*(upload(client) for _ in range(8)))
+            return responses, time.perf_counter() - start
+
+    responses, elapsed = asyncio.run(main())
+
+    assert [r.status_code for r in responses] == [200] * 8
+    assert settings.calls["runs.create_and_process"] == 8
+    # Eight serialized runs would take at least 4s
+    assert elapsed < 2.0
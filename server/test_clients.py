@@ -0,0 +1,57 @@
+import asyncio
+
+from internal import fake_agents
+from services import ai_services, clients
+
+
+def _data_summary():
+    return {
+        "filename": "data.xlsx",
+        "sheets": ["Sheet1"],
+        "total_sheets": 1,
+        "data": {"Sheet1": [{"Date": "2025-01-01", "Daily Sales (THB)": 1200}]},
+    }
+
+
+def test_requests_share_clients_and_token(monkeypatch):
+    settings = fake_agents.install(monkeypatch)
+    settings.run_latency = 0.01
+
+    async def main():
+        await asyncio.gather(
+            *(ai_services.analyze_business_data_with_ai(_data_summary()) for _ in range(5))
+        )
+        stats = clients.get_clients().get_stats()
+        await clients.shutdown()
+        return stats
+
+    stats = asyncio.run(main())
+
+    assert stats["agents_client_created"] == 1
+    assert stats["agents_client_reused"] == 4
+    # Every run goes through the repair model, which shares one OpenAI client
+    assert stats["openai_client_created"] == 1
+    assert stats["openai_client_reused"] == 4
+    # ...and one token, fetched from the credential chain a single time
+    assert stats["token_refreshes"] == 1
+    assert settings.calls["credential.get_token"] == 1
+
+
+def test_expiring_token_is_refreshed(monkeypatch):
+    fake_agents.install(monkeypatch)
+    registry = clients.get_clients()
+    scope = "https://cognitiveservices.azure.com/.default"
+
+    async def main():
+        first = await registry.credential.get_token(scope)
+        # Pretend the token is inside the refresh margin
+        registry.credential._tokens[(scope,)] = type(first)(token="old", expires_on=0)
+        second = await registry.credential.get_token(scope)
+        third = await registry.credential.get_token(scope)
+        return first, second, third
+
+    first, second, third = asyncio.run(main())
+
+    assert second is third
+    assert registry.stats["token_refreshes"] == 2
+    assert registry.stats["token_cache_hits"] == 1
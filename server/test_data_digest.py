@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+
+from services.data_digest import build_digest, dumps_digest, estimate_tokens
+
+
+def _daily_sales(days):
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "Date": pd.date_range("2022-01-01", periods=days, freq="D").strftime("%Y-%m-%d"),
+        "Product": rng.choice(["Mango", "Apple", "Durian", "Melon", "Orange"], days),
+        "Daily Sales (THB)": rng.integers(500, 1500, days),
+    })
+
+
+def test_digest_size_does_not_grow_with_rows():
+    small = dumps_digest(build_digest({"TotalSales": _daily_sales(400)}, "small.xlsx"))
+    large = dumps_digest(build_digest({"TotalSales": _daily_sales(400 * 50)}, "large.xlsx"))
+
+    assert estimate_tokens(large) < 1.5 * estimate_tokens(small)
+    assert estimate_tokens(large) < 6000
+
+
+def test_digest_rollups_match_the_data():
+    df = _daily_sales(120)
+    digest = build_digest({"TotalSales": df}, "sales.xlsx")["sheets"]["TotalSales"]
+
+    january = digest["time_series"]["monthly"][0]
+    expected = df[df["Date"].str.startswith("2022-01")]["Daily Sales (THB)"].sum()
+    assert january == {"month": "2022-01", "days": 31, "Daily Sales (THB)": int(expected)}
+    assert digest["profile"]["Date"]["kind"] == "date"
+    assert set(digest["time_series"]["seasonality"]["weekday_index"]) == {"Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"}
+
+    top = digest["top_by"]["Daily Sales (THB)"]
+    by_product = df.groupby("Product")["Daily Sales (THB)"].sum().sort_values(ascending=False)
+    assert top[0] == [by_product.index[0], int(by_product.iloc[0])]
+
+
+def test_small_sheets_are_kept_verbatim():
+    stock = pd.DataFrame({"Product": ["Mango", "Apple"], "Stock Level": [200, 90]})
+    digest = build_digest({"StockLevels": stock}, "stock.xlsx")["sheets"]["StockLevels"]
+    assert digest["data"] == [{"Product": "Mango", "Stock Level": 200}, {"Product": "Apple", "Stock Level": 90}]
+
+
+def test_tight_budget_lowers_detail_then_drops_sheets():
+    frames = pd.read_excel("../sample_business_data.xlsx", sheet_name=None)
+
+    roomy = build_digest(frames, "sample.xlsx", token_budget=10000)
+    tight = build_digest(frames, "sample.xlsx", token_budget=800)
+
+    assert roomy["detail_level"] == 0 and "omitted_sheets" not in roomy
+    assert tight["detail_level"] == 3
+    assert tight["omitted_sheets"]
+    assert estimate_tokens(dumps_digest(tight)) <= 800
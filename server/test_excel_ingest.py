@@ -0,0 +1,87 @@
+import os
+import asyncio
+import datetime
+
+import httpx
+import pandas as pd
+import pytest
+from openpyxl import Workbook, load_workbook
+
+from internal import fake_agents
+from services import analysis_cache, excel_ingest
+from services.analysis_cache import AnalysisCache
+from services.excel_ingest import IngestLimitExceeded, read_sheet, read_workbook
+
+
+def _awkward_workbook(path):
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Mixed"
+    ws.append(["Product", None, "Product", "Date", "N/A"])
+    ws.append([1, "x", 2.5, datetime.datetime(2024, 1, 1), "#N/A"])
+    ws.append([])
+    ws.append([2.0, None, None, datetime.datetime(2024, 1, 2)])
+    ws.append(["t", 3, "NA", None, None, 7])
+    ws.append([])
+    wb.create_sheet("Empty")
+    wb.create_sheet("HeaderOnly").append(["a", "b"])
+    wb.save(path)
+    return path
+
+
+@pytest.mark.parametrize("path", ["data.xlsx", "../fruits.xlsx", "../retail_business_data.xlsx",
+                                  "../sample_business_data.xlsx", "awkward"])
+def test_streaming_reader_matches_read_excel(path, tmp_path):
+    if path == "awkward":
+        path = _awkward_workbook(tmp_path / "awkward.xlsx")
+    expected = pd.read_excel(path, sheet_name=None)
+
+    actual = read_workbook(str(path))
+
+    assert list(actual) == list(expected)
+    for name in expected:
+        pd.testing.assert_frame_equal(actual[name], expected[name])
+    # Small chunks must not change the dtypes pandas would infer
+    for ws in load_workbook(path, read_only=True, data_only=True).worksheets:
+        pd.testing.assert_frame_equal(read_sheet(ws, chunk_rows=2), expected[ws.title])
+
+
+def test_sheets_over_the_row_limit_are_rejected():
+    with pytest.raises(IngestLimitExceeded, match="TotalSales"):
+        read_workbook("../fruits.xlsx", max_rows=100)
+
+
+def test_oversized_upload_gets_413(monkeypatch, tmp_path):
+    from main import app
+
+    settings = fake_agents.install(monkeypatch)
+    monkeypatch.setattr(analysis_cache, "_cache", AnalysisCache(directory=str(tmp_path)))
+    monkeypatch.setattr(excel_ingest, "MAX_UPLOAD_BYTES", 4096)
+    monkeypatch.setattr(excel_ingest.tempfile, "tempdir", str(tmp_path))
+    with open("../fruits.xlsx", "rb") as f:
+        workbook = f.read()
+
+    async def main():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            files = {"file": ("fruits.xlsx", workbook, "application/vnd.ms-excel")}
+            return await client.post("/ai/analyze-excel/", files=files)
+
+    response = asyncio.run(main())
+
+    assert response.status_code == 413
+    assert "upload limit" in response.json()["detail"]
+    assert "runs.create_and_process" not in settings.calls
+    # The partial spool file is removed
+    assert not [name for name in os.listdir(tmp_path) if name.startswith("upload-")]
+
+
+def test_non_excel_upload_is_still_a_400():
+    from main import app
+
+    async def main():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/ai/analyze-excel/", files={"file": ("notes.txt", b"hi", "text/plain")})
+
+    assert asyncio.run(main()).status_code == 400
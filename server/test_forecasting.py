@@ -0,0 +1,70 @@
+import asyncio
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_forecasting import synthetic_sales
+from internal import fake_agents
+from services import ai_services, analysis_cache
+from services.forecasting import build_forecast, forecast_monthly
+
+
+def test_recovers_trend_and_seasonality():
+    dates = pd.date_range("2021-01-01", "2024-12-31", freq="D")
+    season = 1 + 0.3 * np.sin(2 * np.pi * (dates.month.to_numpy() - 1) / 12)
+    rate = 1000 * season
+    daily = pd.Series(rate, index=dates)
+
+    forecast = forecast_monthly(daily)
+    model = forecast["model"]
+
+    assert model["method"] == "trend+seasonal"
+    assert abs(model["trend_pct_per_month"]) < 0.5
+    assert model["seasonal_index"]["Apr"] > 1.25 > 0.75 > model["seasonal_index"]["Oct"]
+    expected = [1000 * (1 + 0.3 * np.sin(2 * np.pi * m / 12)) * days
+                for m, days in enumerate(pd.period_range("2025-01", periods=12, freq="M").days_in_month)]
+    actual = [m["most_likely"] for m in forecast["monthly_forecasts"]]
+    np.testing.assert_allclose(actual, expected, rtol=0.05)
+
+
+def test_forecast_matches_the_analysis_contract():
+    frames = pd.read_excel("../fruits.xlsx", sheet_name=None)
+    forecast = build_forecast(frames)
+
+    assert forecast["source"] == {"sheet": "TotalSales", "column": "Daily Sales (THB)"}
+    months = forecast["monthly_forecasts"]
+    assert [m["month"] for m in months[:2]] == ["July 2025", "August 2025"]
+    assert len(months) == 12
+    for m in months:
+        assert m["worst_case"] <= 0.6 * m["most_likely"] + 1
+        assert m["best_case"] >= 1.3 * m["most_likely"] - 1
+    confidence = [m["confidence"] for m in months]
+    assert confidence == sorted(confidence, reverse=True) and confidence[0] > confidence[-1]
+
+
+def test_multi_year_daily_forecast_takes_milliseconds():
+    frames = {"TotalSales": synthetic_sales(years=10)}
+    build_forecast(frames)
+    start = time.perf_counter()
+    build_forecast(frames)
+    assert time.perf_counter() - start < 0.2
+
+
+def test_pipeline_fills_monthly_forecasts_server_side(monkeypatch, tmp_path):
+    settings = fake_agents.install(monkeypatch)
+    settings.run_latency = 0.01
+    monkeypatch.setattr(analysis_cache, "_cache", analysis_cache.AnalysisCache(directory=str(tmp_path)))
+    with open("../fruits.xlsx", "rb") as f:
+        contents = f.read()
+
+    result = asyncio.run(ai_services.ai_analyze_excel_data(contents, "fruits.xlsx"))
+
+    analysis = json.loads(result["ai_analysis"]["analysis_response"])
+    expected = build_forecast(pd.read_excel("../fruits.xlsx", sheet_name=None))
+    assert analysis["sales_forecasting"]["monthly_forecasts"] == expected["monthly_forecasts"]
+    # The agent keeps its narrative
+    assert analysis["sales_forecasting"]["key_insights"] == ["Weekend sales are higher"]
+    prompts = [m["content"] for thread in fake_agents._THREADS.values() for m in thread if m["role"] == "user"]
+    assert "SERVER-SIDE FORECAST" in prompts[0]
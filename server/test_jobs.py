@@ -0,0 +1,121 @@
+import os
+import time
+import shutil
+import asyncio
+
+import httpx
+
+from internal import fake_agents
+from services import analysis_cache, jobs
+from services.analysis_cache import AnalysisCache
+from services.jobs import JobRunner, JobStore
+
+
+def test_job_is_accepted_immediately_and_polled_to_completion(monkeypatch, tmp_path):
+    from main import app
+
+    settings = fake_agents.install(monkeypatch)
+    settings.run_latency = 0.5
+    monkeypatch.setattr(analysis_cache, "_cache", AnalysisCache(directory=str(tmp_path / "cache")))
+    monkeypatch.setattr(jobs, "_runner", JobRunner(JobStore(str(tmp_path / "jobs")), poll_interval=0.05))
+    with open("data.xlsx", "rb") as f:
+        workbook = f.read()
+
+    async def main():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            start = time.perf_counter()
+            files = {"file": ("data.xlsx", workbook, "application/vnd.ms-excel")}
+            submitted = await client.post("/ai/analyze-excel/jobs/", files=files)
+            accepted_in = time.perf_counter() - start
+
+            statuses = []
+            while True:
+                job = (await client.get(submitted.json()["status_url"])).json()
+                statuses.append(job["status"])
+                if job["status"] in ("succeeded", "failed"):
+                    break
+                await asyncio.sleep(0.05)
+            missing = await client.get("/ai/jobs/does-not-exist")
+            await jobs.shutdown()
+            return submitted, accepted_in, statuses, job, missing
+
+    submitted, accepted_in, statuses, job, missing = asyncio.run(main())
+
+    assert submitted.status_code == 202
+    assert submitted.json()["status"] == "queued"
+    assert accepted_in < settings.run_latency
+    assert "running" in statuses
+    assert job["status"] == "succeeded", job.get("error")
+    assert job["result"]["filename"] == "data.xlsx"
+    assert "sales_forecasting" in job["result"]["analysis"]["ai_analysis"]["analysis_response"]
+    assert missing.status_code == 404
+    # The spooled workbook is dropped once the job is done
+    assert not [name for name in os.listdir(tmp_path / "jobs") if name.endswith(".xlsx")]
+
+
+def test_jobs_survive_a_worker_restart(tmp_path):
+    store = JobStore(str(tmp_path))
+    shutil.copy("data.xlsx", tmp_path / "upload.xlsx")
+    job_id = store.create(str(tmp_path / "upload.xlsx"), "data.xlsx", "sha")
+    # A worker claims the job and dies without finishing it
+    assert store.claim()["id"] == job_id
+
+    handled = []
+
+    async def handler(job, set_stage):
+        await set_stage("analyzing")
+        handled.append(job["id"])
+        assert os.path.exists(job["workbook_path"])
+        return {"ok": True}
+
+    async def restart():
+        runner = JobRunner(JobStore(str(tmp_path)), handler=handler, poll_interval=0.01, stale_after=0)
+        await runner.start()
+        while (await runner.get(job_id))["status"] != "succeeded":
+            await asyncio.sleep(0.01)
+        await runner.stop()
+        return await runner.get(job_id)
+
+    job = asyncio.run(restart())
+
+    assert handled == [job_id]
+    assert job["attempts"] == 2
+    assert jobs.job_view(job)["result"] == {"ok": True}
+    assert job["workbook_path"] is None and not os.path.exists(tmp_path / f"{job_id}.xlsx")
+
+
+def test_worker_pool_is_bounded_and_failures_are_recorded(tmp_path):
+    active = []
+    peak = []
+
+    async def handler(job, set_stage):
+        active.append(job["id"])
+        peak.append(len(active))
+        await asyncio.sleep(0.05)
+        active.remove(job["id"])
+        if job["filename"] == "bad.xlsx":
+            raise ValueError("Worksheet is unreadable")
+        return {"filename": job["filename"]}
+
+    async def main():
+        runner = JobRunner(JobStore(str(tmp_path)), handler=handler, workers=2, poll_interval=0.01)
+        ids = []
+        for i in range(6):
+            path = tmp_path / f"upload{i}.xlsx"
+            path.write_bytes(b"x")
+            name = "bad.xlsx" if i == 0 else f"ok{i}.xlsx"
+            ids.append((await runner.submit(str(path), name, "sha"))["id"])
+        while True:
+            statuses = [(await runner.get(i))["status"] for i in ids]
+            if not {"queued", "running"} & set(statuses):
+                break
+            await asyncio.sleep(0.01)
+        await runner.stop()
+        return [jobs.job_view(await runner.get(i)) for i in ids]
+
+    views = asyncio.run(main())
+
+    assert max(peak) == 2
+    assert views[0]["status"] == "failed" and views[0]["error"] == "Worksheet is unreadable"
+    assert all(v["status"] == "succeeded" for v in views[1:])